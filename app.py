@@ -5,16 +5,43 @@ Version simplifiée et stable
 """
 
 import os
+import io
+import gzip
 import json
+import shutil
+import queue
 import logging
+import threading
+from datetime import timedelta
+from urllib.parse import quote
 import tempfile
+import traceback
+import importlib
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from datetime import datetime
+import base64
+import time
 import uuid
 
-from flask import Flask, request, jsonify, send_file, Response
+from cachetools import TTLCache
+from flask import Flask, request, send_file, redirect, Response
 from flask_cors import CORS
 from google.cloud import storage
+from google.cloud.storage import transfer_manager
+from google.api_core.exceptions import NotFound, PreconditionFailed
+from google.auth.transport.requests import Request as AuthRequest
+from requests.adapters import HTTPAdapter
+
+# Sérialisation JSON : orjson (C/Rust) si disponible, bibliothèque standard sinon.
+# Les deux variantes produisent des bytes UTF-8.
+try:
+    import orjson
+    json_dumps = orjson.dumps
+    json_loads = orjson.loads
+except ImportError:
+    def json_dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+    json_loads = json.loads
 
 # Configuration logging
 logging.basicConfig(level=logging.INFO)
@@ -23,23 +50,124 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 CORS(app)
 
+# Taille maximale d'upload : Werkzeug rejette (413) avant de lire le corps de la requête
+MAX_UPLOAD_BYTES = int(os.environ.get('MAX_UPLOAD_BYTES', 200 * 1024 * 1024))
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_BYTES
+
+# Signature PDF, recherchée dans le premier Ko du fichier (comme le tolèrent les lecteurs PDF)
+PDF_MAGIC = b'%PDF-'
+PDF_MAGIC_WINDOW = 1024
+
 # Configuration GCP
 PROJECT_ID = os.environ.get('GOOGLE_CLOUD_PROJECT')
 BUCKET_NAME = os.environ.get('STORAGE_BUCKET', f'{PROJECT_ID}-manualminer-storage')
 
-# Initialiser le client Storage
+# Taille des blocs de transfert GCS (multiple de 256 KB)
+GCS_CHUNK_SIZE = 8 * 1024 * 1024
+# Au-delà de ce seuil, les transferts GCS sont découpés en blocs parallèles
+GCS_PARALLEL_THRESHOLD = 4 * GCS_CHUNK_SIZE
+GCS_TRANSFER_WORKERS = 8
+
+# Délimiteurs d'un événement SSE, précalculés en bytes
+SSE_DATA_PREFIX = b'data: '
+SSE_EVENT_END = b'\n\n'
+
+# Événement SSE d'échec, envoyé tel quel au client
+SSE_ERROR = b'data: {"type":"error"}\n\n'
+
+# Commentaire SSE envoyé pendant l'analyse pour garder la connexion ouverte (proxies)
+SSE_KEEPALIVE = b': keepalive\n\n'
+SSE_KEEPALIVE_INTERVAL = 15
+
+# Cache court des statuts d'analyse (polling du frontend) : nom des fichiers par analysis_id
+STATUS_CACHE_TTL = 5
+status_cache = TTLCache(maxsize=1024, ttl=STATUS_CACHE_TTL)
+status_cache_lock = threading.Lock()
+
+# Durée de cache client des synthèses téléchargées (revalidées par ETag)
+DOWNLOAD_MAX_AGE = 3600
+
+# Durée de validité des URLs signées de téléchargement (le client télécharge depuis GCS)
+DOWNLOAD_URL_EXPIRATION = timedelta(minutes=15)
+
+# Taille du tampon de copie de l'upload vers le fichier temporaire
+UPLOAD_COPY_BUFFER = 1024 * 1024
+
+# Après un échec d'initialisation, délai avant une nouvelle tentative (secondes) ;
+# seules les routes qui ont besoin de l'analyseur relancent l'initialisation
+INIT_RETRY_BACKOFF = 30
+INIT_ENDPOINTS = frozenset({'health_check', 'analyze_pdf'})
+
+# Initialiser le client Storage avec un pool de connexions adapté à la concurrence Cloud Run.
+# Pas de retries au niveau transport : google-cloud-storage applique ses propres politiques
+# (DEFAULT_RETRY, retries conditionnés aux préconditions de génération).
+# Le client reste en JSON/HTTP : google-cloud-storage 2.x n'expose pas de transport gRPC,
+# et transfer_manager (XML multipart) et BlobReader n'existent qu'en HTTP.
 storage_client = storage.Client()
+storage_adapter = HTTPAdapter(
+    pool_connections=128,
+    pool_maxsize=128,
+    pool_block=False
+)
+storage_client._http.mount('https://', storage_adapter)
+# Également en HTTP (émulateur GCS local via STORAGE_EMULATOR_HOST)
+storage_client._http.mount('http://', storage_adapter)
+
+# Configuration de l'analyseur, parsée une seule fois par process
+CONFIG_PATH = "config.json"
+_config_cache = None
+
+def load_config() -> dict:
+    """Retourne config.json parsé (lecture et parsing au premier appel uniquement)"""
+    global _config_cache
+    if _config_cache is None:
+        with open(CONFIG_PATH, 'rb') as f:
+            _config_cache = json_loads(f.read())
+    return _config_cache
 
 class ManualMinerAPI:
     """API ManualMiner version simplifiée"""
     
     def __init__(self):
-        self.analyzer = None
+        # Un analyseur partagé par les threads du worker : ses clients (Document AI gRPC, Gemini)
+        # sont thread-safe et l'état d'une analyse reste local à analyze_manual_organized
+        self.analyzer_class = None
+        self.analyzer_config = None
+        self._analyzer = None
+        self._analyzer_lock = threading.Lock()
         self.latex_generator = None
         self.storage_bucket = None
         self.temp_dir = Path(tempfile.gettempdir()) / "manualminer"
         self.temp_dir.mkdir(exist_ok=True)
         self.initialized = False
+        self.last_init_failure = None
+        
+        # gunicorn --preload : les canaux gRPC et sockets HTTP ne survivent pas au fork
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self.reset_connections_after_fork)
+        
+    def reset_connections_after_fork(self):
+        """Repartir de connexions neuves dans un worker forké (config parsée conservée)"""
+        # L'analyseur (client Document AI gRPC, modèles Gemini) est reconstruit à la demande ;
+        # verrou neuf : il a pu être copié verrouillé par un autre thread du parent
+        self._analyzer = None
+        self._analyzer_lock = threading.Lock()
+        # Vide le pool HTTP GCS hérité ; de nouvelles connexions sont ouvertes au besoin
+        storage_client._http.close()
+        
+    @property
+    def analyzer(self):
+        """Analyseur partagé du process (construit une seule fois), ou None si non initialisé"""
+        if self.analyzer_class is None:
+            return None
+        
+        analyzer = self._analyzer
+        if analyzer is None:
+            with self._analyzer_lock:
+                if self._analyzer is None:
+                    self._analyzer = self.analyzer_class.from_dict(self.analyzer_config)
+                analyzer = self._analyzer
+        return analyzer
         
     def initialize(self):
         """Initialisation des composants"""
@@ -49,28 +177,22 @@ class ManualMinerAPI:
         try:
             logger.info("=== DÉBUT INITIALISATION MANUALMINER ===")
             
-            # Vérifier la présence du fichier config.json
-            import os
-            config_path = "config.json"
-            if not os.path.exists(config_path):
-                logger.error(f"ERREUR: config.json non trouvé dans {os.getcwd()}")
-                return False
-            logger.info(f"✓ config.json trouvé: {config_path}")
-            
-            # Vérifier le contenu de config.json
+            # Lire config.json (présence et contenu vérifiés en une seule ouverture)
             try:
-                import json
-                with open(config_path, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                logger.info("✓ config.json lu avec succès")
+                try:
+                    config = load_config()
+                except FileNotFoundError:
+                    logger.error("ERREUR: config.json non trouvé dans %s", os.getcwd())
+                    return False
+                logger.info("✓ config.json lu avec succès: %s", CONFIG_PATH)
                 
                 # Vérifier les clés critiques
                 if 'google_cloud' in config and 'credentials_path' in config['google_cloud']:
                     creds_path = config['google_cloud']['credentials_path']
                     if os.path.exists(creds_path):
-                        logger.info(f"✓ Fichier credentials trouvé: {creds_path}")
+                        logger.info("✓ Fichier credentials trouvé: %s", creds_path)
                     else:
-                        logger.error(f"✗ Fichier credentials MANQUANT: {creds_path}")
+                        logger.error("✗ Fichier credentials MANQUANT: %s", creds_path)
                         return False
                 else:
                     logger.error("✗ Configuration Google Cloud manquante")
@@ -88,93 +210,121 @@ class ManualMinerAPI:
                     return False
                     
             except Exception as e:
-                logger.error(f"✗ Erreur lecture config.json: {e}")
+                logger.error("✗ Erreur lecture config.json: %s", e)
                 return False
             
             # Initialiser le bucket Storage
             try:
                 self.storage_bucket = storage_client.bucket(BUCKET_NAME)
-                logger.info(f"✓ Bucket connecté: {BUCKET_NAME}")
+                logger.info("✓ Bucket connecté: %s", BUCKET_NAME)
             except Exception as e:
-                logger.error(f"✗ Erreur bucket: {e}")
+                logger.error("✗ Erreur bucket: %s", e)
+                
+            # Lancer les imports lourds en parallèle (analyseur et générateur LaTeX)
+            with ThreadPoolExecutor(max_workers=2) as import_executor:
+                analyzer_import = import_executor.submit(importlib.import_module, 'lab_manual_analyzer_organized')
+                latex_import = import_executor.submit(importlib.import_module, 'latex_generator')
                 
             # Essayer d'initialiser l'analyseur avec logs détaillés
             try:
                 logger.info("--- Initialisation LabManualAnalyzer ---")
-                logger.info(f"Working directory: {os.getcwd()}")
-                logger.info(f"Files in working directory: {os.listdir('.')}")
+                logger.info("Working directory: %s", os.getcwd())
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Files in working directory: %s", os.listdir('.'))
                 
                 # Import conditionnel pour éviter les erreurs de démarrage
-                from lab_manual_analyzer_organized import LabManualAnalyzerStrict
+                LabManualAnalyzerStrict = analyzer_import.result().LabManualAnalyzerStrict
                 logger.info("✓ Import LabManualAnalyzerStrict réussi")
                 
-                self.analyzer = LabManualAnalyzerStrict("config.json")
+                analyzer = LabManualAnalyzerStrict.from_dict(config)
+                self._analyzer = analyzer
+                self.analyzer_config = config
+                self.analyzer_class = LabManualAnalyzerStrict
                 logger.info("✓ LabManualAnalyzer initialisé avec succès")
                 
                 # Test rapide de l'analyseur
-                if hasattr(self.analyzer, 'doc_ai_client') and self.analyzer.doc_ai_client:
+                if hasattr(analyzer, 'doc_ai_client') and analyzer.doc_ai_client:
                     logger.info("✓ Client Document AI initialisé")
                 else:
                     logger.warning("⚠ Client Document AI non initialisé")
                     
-                if hasattr(self.analyzer, 'gemini_model') and self.analyzer.gemini_model:
+                if hasattr(analyzer, 'gemini_model') and analyzer.gemini_model:
                     logger.info("✓ Modèle Gemini initialisé")
                 else:
                     logger.warning("⚠ Modèle Gemini non initialisé")
                     
             except ImportError as e:
-                logger.error(f"✗ Erreur import LabManualAnalyzer: {e}")
+                logger.error("✗ Erreur import LabManualAnalyzer: %s", e)
                 return False
             except Exception as e:
-                logger.error(f"✗ Erreur initialisation LabManualAnalyzer: {e}")
-                logger.error(f"Type d'erreur: {type(e).__name__}")
-                import traceback
-                logger.error(f"Traceback complet:\n{traceback.format_exc()}")
+                logger.error("✗ Erreur initialisation LabManualAnalyzer: %s", e)
+                logger.error("Type d'erreur: %s", type(e).__name__)
+                logger.error("Traceback complet:\n%s", traceback.format_exc())
                 return False
                 
             # Essayer d'initialiser le générateur LaTeX  
             try:
                 logger.info("--- Initialisation LaTeX Generator ---")
-                from latex_generator import LatexSynthesisGenerator
+                LatexSynthesisGenerator = latex_import.result().LatexSynthesisGenerator
                 logger.info("✓ Import LatexSynthesisGenerator réussi")
                 
                 self.latex_generator = LatexSynthesisGenerator()
                 logger.info("✓ LaTeX Generator initialisé")
             except Exception as e:
-                logger.warning(f"⚠ LaTeX Generator non initialisé: {e}")
+                logger.warning("⚠ LaTeX Generator non initialisé: %s", e)
                 
             self.initialized = True
             logger.info("=== INITIALISATION MANUALMINER TERMINÉE AVEC SUCCÈS ===")
             return True
             
         except Exception as e:
-            logger.error(f"✗ ERREUR CRITIQUE INITIALISATION: {e}")
-            import traceback
-            logger.error(f"Traceback complet:\n{traceback.format_exc()}")
+            logger.error("✗ ERREUR CRITIQUE INITIALISATION: %s", e)
+            logger.error("Traceback complet:\n%s", traceback.format_exc())
             return False
 
 # Instance globale
 manualminer = ManualMinerAPI()
+init_lock = threading.Lock()
+
+def ensure_initialized():
+    """Initialise ManualMiner une seule fois par process (double vérification sous verrou),
+    sans retenter avant INIT_RETRY_BACKOFF secondes après un échec"""
+    if manualminer.initialized:
+        return
+    with init_lock:
+        if manualminer.initialized:
+            return
+        last_failure = manualminer.last_init_failure
+        if last_failure is not None and time.monotonic() - last_failure < INIT_RETRY_BACKOFF:
+            return
+        if not manualminer.initialize():
+            manualminer.last_init_failure = time.monotonic()
+
+@app.before_request
+def ensure_initialized_for_request():
+    """Relance l'initialisation pour /health et /analyze uniquement (routes GCS exclues)"""
+    if request.endpoint in INIT_ENDPOINTS:
+        ensure_initialized()
+
+# Initialiser au chargement du module (pendant le boost CPU de démarrage sur Cloud Run,
+# ou une seule fois avant le fork avec gunicorn --preload) plutôt qu'à la première requête
+ensure_initialized()
 
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check pour Cloud Run"""
     try:
-        # Initialiser si pas encore fait
-        if not manualminer.initialized:
-            manualminer.initialize()
-            
         # Statut des composants
-        analyzer_status = "OK" if manualminer.analyzer is not None else "Non initialisé"
+        analyzer_status = "OK" if manualminer.analyzer_class is not None else "Non initialisé"
         latex_status = "OK" if manualminer.latex_generator is not None else "Non initialisé"
         bucket_status = "OK" if manualminer.storage_bucket is not None else "Non initialisé"
         
         overall_status = "healthy" if manualminer.initialized else "degraded"
         
-        return jsonify({
+        return json_response({
             "status": overall_status,
             "service": "ManualMiner API",
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": iso_timestamp(),
             "components": {
                 "analyzer": analyzer_status,
                 "latex_generator": latex_status,
@@ -182,52 +332,76 @@ def health_check():
             }
         })
     except Exception as e:
-        logger.error(f"Erreur health check: {e}")
-        return jsonify({
+        logger.error("Erreur health check: %s", e)
+        return json_response({
             "status": "error",
             "service": "ManualMiner API", 
             "error": str(e),
-            "timestamp": datetime.now().isoformat()
-        }), 500
+            "timestamp": iso_timestamp()
+        }, 500)
 
 @app.route('/analyze', methods=['POST'])
 def analyze_pdf():
     """
     Analyse d'un PDF médical - Endpoint principal avec support multilingue
     """
+    if request.content_length and request.content_length > MAX_UPLOAD_BYTES:
+        return json_response({"error": "Fichier trop volumineux"}, 413)
+    
     if 'file' not in request.files:
-        return jsonify({"error": "Aucun fichier fourni"}), 400
+        return json_response({"error": "Aucun fichier fourni"}, 400)
     
     file = request.files['file']
-    if file.filename == '':
-        return jsonify({"error": "Nom de fichier vide"}), 400
+    file_filename = file.filename
+    if not file_filename:
+        return json_response({"error": "Nom de fichier vide"}, 400)
     
-    if not file.filename.lower().endswith('.pdf'):
-        return jsonify({"error": "Le fichier doit être un PDF"}), 400
+    # Seule l'extension est mise en minuscules, pas le nom complet
+    if file_filename[-4:].lower() != '.pdf':
+        return json_response({"error": "Le fichier doit être un PDF"}, 400)
     
     # Récupérer la langue (par défaut français pour compatibilité)
     language = request.form.get('language', 'fr')
     if language not in ['fr', 'en']:
         language = 'fr'  # fallback par défaut
     
-    # CORRECTION CRITIQUE : Lire le fichier ICI avant le streaming
+    # CORRECTION CRITIQUE : le flux de la requête est fermé une fois la vue retournée,
+    # le fichier doit donc être persisté ICI avant le streaming (copie par blocs, sans
+    # matérialiser tout le PDF en mémoire)
     try:
-        file_content = file.read()
-        file_filename = file.filename
+        file.stream.seek(0, os.SEEK_END)
+        file_size = file.stream.tell()
+        file.stream.seek(0)
+        
+        if not file_size:
+            return json_response({"error": "Fichier PDF vide"}, 400)
         
-        if not file_content:
-            return jsonify({"error": "Fichier PDF vide"}), 400
+        # Vérifier la signature PDF sans lire tout l'upload
+        head = file.stream.read(PDF_MAGIC_WINDOW)
+        file.stream.seek(0)
+        if PDF_MAGIC not in head:
+            return json_response({"error": "Le fichier doit être un PDF"}, 400)
             
     except Exception as e:
-        return jsonify({"error": f"Erreur lecture fichier: {str(e)}"}), 400
+        return json_response({"error": f"Erreur lecture fichier: {str(e)}"}, 400)
     
     # Vérifier si c'est une requête streaming
     accept_header = request.headers.get('Accept', '')
     is_streaming = 'text/event-stream' in accept_header
     
     if is_streaming:
+        analysis_id = new_analysis_id()
+        temp_pdf_path = manualminer.temp_dir / f"{analysis_id}_{file_filename}"
+        
+        try:
+            temp_fd = persist_upload(file.stream, temp_pdf_path)
+        except Exception as e:
+            if temp_pdf_path.exists():
+                temp_pdf_path.unlink()
+            return json_response({"error": f"Erreur sauvegarde fichier: {str(e)}"}, 500)
+        
         return Response(
-            stream_analysis_with_content(file_content, file_filename, language),
+            stream_analysis_with_content(temp_pdf_path, analysis_id, file_filename, language, temp_fd),
             mimetype='text/event-stream',
             headers={
                 'Cache-Control': 'no-cache',
@@ -237,80 +411,262 @@ def analyze_pdf():
         )
     else:
         # Traitement synchrone pour compatibilité
-        return process_pdf_sync_with_content(file_content, file_filename, language)
-
-def stream_analysis_with_content(file_content, filename, language='fr'):
-    """Stream l'analyse en temps réel avec contenu pré-lu et support multilingue"""
-    def send_log(level: str, message: str):
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        log_data = json.dumps({
-            "timestamp": timestamp,
-            "level": level,
-            "message": message
-        })
-        return f"data: {log_data}\n\n"
+        return process_pdf_sync_with_content(file_size, file_filename, language)
+
+def iso_timestamp() -> str:
+    """Horodatage ISO 8601 local à la seconde, sans objet datetime intermédiaire"""
+    return time.strftime("%Y-%m-%dT%H:%M:%S")
+
+def new_analysis_id() -> str:
+    """Identifiant d'analyse aléatoire (96 bits), 16 caractères sûrs pour URL et préfixe GCS"""
+    return base64.urlsafe_b64encode(os.urandom(12)).decode('ascii')
+
+# Dernier horodatage formaté, réutilisé tant que la seconde ne change pas
+_last_log_timestamp = (0, "")
+
+def log_timestamp() -> str:
+    """Horodatage HH:MM:SS des logs SSE, reformaté au plus une fois par seconde"""
+    global _last_log_timestamp
+    now = int(time.time())
+    cached = _last_log_timestamp
+    if cached[0] != now:
+        cached = (now, time.strftime("%H:%M:%S", time.localtime(now)))
+        _last_log_timestamp = cached
+    return cached[1]
+
+def sse_event(payload: dict) -> bytes:
+    """Événement SSE 'data:' encodé en une seule jonction de bytes"""
+    return b"".join((SSE_DATA_PREFIX, json_dumps(payload), SSE_EVENT_END))
+
+def send_log(level: str, message: str) -> bytes:
+    """Événement SSE de log"""
+    return sse_event({
+        "timestamp": log_timestamp(),
+        "level": level,
+        "message": message
+    })
+
+def json_response(payload, status: int = 200) -> Response:
+    """Réponse JSON sérialisée via json_dumps"""
+    return app.response_class(json_dumps(payload), status=status, mimetype='application/json')
+
+def copy_upload(stream, dst):
+    """Copie le flux uploadé vers un fichier ouvert en écriture"""
+    if isinstance(stream, io.BytesIO):
+        # Petit upload gardé en mémoire par Werkzeug : une seule écriture du buffer
+        dst.write(stream.getbuffer())
+    else:
+        shutil.copyfileobj(stream, dst, UPLOAD_COPY_BUFFER)
+
+def persist_upload(stream, temp_pdf_path: Path):
+    """
+    Persiste le PDF uploadé pour l'analyse.
+    
+    Sous Linux, les données sont écrites dans un inode anonyme (O_TMPFILE), libéré
+    automatiquement à la fermeture du descripteur même si le worker est tué en cours
+    d'analyse ; temp_pdf_path n'est alors qu'un lien symbolique vers /proc/self/fd.
+    Retourne le descripteur à fermer après l'analyse, ou None pour un fichier classique.
+    """
+    temp_fd = None
+    if hasattr(os, 'O_TMPFILE'):
+        try:
+            temp_fd = os.open(temp_pdf_path.parent, os.O_TMPFILE | os.O_RDWR, 0o600)
+        except OSError:
+            # Système de fichiers sans support O_TMPFILE
+            temp_fd = None
+    
+    if temp_fd is None:
+        with open(temp_pdf_path, 'wb') as temp_pdf:
+            copy_upload(stream, temp_pdf)
+        return None
     
-    temp_pdf_path = None
+    try:
+        with os.fdopen(temp_fd, 'wb', closefd=False) as temp_pdf:
+            copy_upload(stream, temp_pdf)
+        os.symlink(f"/proc/self/fd/{temp_fd}", temp_pdf_path)
+    except Exception:
+        os.close(temp_fd)
+        raise
     
+    return temp_fd
+
+def gzip_file(src: Path) -> Path:
+    """Compresse un fichier en gzip à côté de l'original et retourne le chemin du .gz"""
+    gz_path = src.with_name(src.name + '.gz')
     try:
-        # Initialiser si pas encore fait
-        if not manualminer.initialized:
-            yield send_log("info", "Initialisation ManualMiner...")
-            manualminer.initialize()
+        with open(src, 'rb') as f_in, gzip.open(gz_path, 'wb', compresslevel=6) as f_out:
+            shutil.copyfileobj(f_in, f_out, UPLOAD_COPY_BUFFER)
+    except BaseException:
+        # Ne pas laisser de .gz partiel derrière une compression interrompue
+        gz_path.unlink(missing_ok=True)
+        raise
+    return gz_path
+
+def signed_download_url(blob, download_filename: str):
+    """
+    URL signée V4 permettant au client de télécharger la synthèse directement depuis GCS.
+    
+    Sans clé privée (identité Cloud Run par défaut), la signature passe par l'API IAM
+    signBlob avec le jeton d'accès du compte de service. Retourne None si la signature
+    est impossible : le téléchargement est alors servi par l'API.
+    """
+    sign_kwargs = {
+        "version": "v4",
+        "expiration": DOWNLOAD_URL_EXPIRATION,
+        "method": "GET",
+        "response_type": "application/pdf",
+        "response_disposition": f"attachment; filename*=UTF-8''{quote(download_filename)}"
+    }
+    try:
+        return blob.generate_signed_url(**sign_kwargs)
+    except Exception:
+        pass
+    
+    try:
+        credentials = storage_client._credentials
+        if not credentials.valid:
+            credentials.refresh(AuthRequest())
+        return blob.generate_signed_url(
+            service_account_email=credentials.service_account_email,
+            access_token=credentials.token,
+            **sign_kwargs
+        )
+    except Exception as e:
+        logger.warning("⚠ URL signée indisponible, téléchargement via l'API: %s", e)
+        return None
+
+def run_with_keepalive(func, *args):
+    """
+    Exécute func dans un thread dédié et envoie des keepalive SSE pendant l'attente.
+    
+    À utiliser dans un générateur SSE via `result = yield from run_with_keepalive(...)` ;
+    une exception levée par func est relevée dans le générateur.
+    """
+    results = queue.Queue()
+    
+    def worker():
+        # BaseException aussi (SystemExit levé par une bibliothèque...) : le générateur
+        # reçoit toujours un résultat et ne boucle jamais sur les keepalive
+        try:
+            results.put((func(*args), None))
+        except BaseException as error:
+            results.put((None, error))
+    
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    try:
+        while True:
+            try:
+                result, error = results.get(timeout=SSE_KEEPALIVE_INTERVAL)
+                break
+            except queue.Empty:
+                if not thread.is_alive() and results.empty():
+                    # Thread terminé sans résultat : ne pas maintenir le flux indéfiniment
+                    raise RuntimeError("Traitement interrompu sans résultat")
+                yield SSE_KEEPALIVE
+    finally:
+        # Client déconnecté : attendre la fin du travail avant tout nettoyage
+        thread.join()
+    
+    if error is not None:
+        raise error
+    return result
+
+def upload_synthesis(blob, pdf_path: Path):
+    """Upload de la synthèse PDF vers Cloud Storage"""
+    # Upload pré-compressé : GCS stocke l'objet avec Content-Encoding gzip
+    blob.content_encoding = 'gzip'
+    if pdf_path.stat().st_size > GCS_PARALLEL_THRESHOLD:
+        # Gros PDF : fichier .gz requis par l'upload parallèle. upload_chunks_concurrently
+        # n'accepte pas de précondition : upload vers un objet de transit, puis copie côté
+        # serveur (même bucket, sans recopie des données) avec if_generation_match=0
+        gz_path = None
+        staging_blob = blob.bucket.blob(f"{blob.name}.upload-{uuid.uuid4().hex}")
+        staging_blob.metadata = blob.metadata
+        staging_blob.content_encoding = blob.content_encoding
+        try:
+            gz_path = gzip_file(pdf_path)
+            transfer_manager.upload_chunks_concurrently(
+                str(gz_path),
+                staging_blob,
+                content_type='application/pdf',
+                chunk_size=GCS_CHUNK_SIZE,
+                deadline=600,
+                worker_type=transfer_manager.THREAD,
+                max_workers=GCS_TRANSFER_WORKERS,
+                checksum='crc32c'
+            )
+            try:
+                blob.bucket.copy_blob(staging_blob, blob.bucket, blob.name, if_generation_match=0)
+            except PreconditionFailed:
+                # Nom unique par analyse : l'objet existe déjà, c'est un retry dont la réponse s'est perdue
+                logger.info("Synthèse déjà présente (retry après réponse perdue): %s", blob.name)
+        finally:
+            if gz_path is not None:
+                gz_path.unlink(missing_ok=True)
+            try:
+                staging_blob.delete()
+            except NotFound:
+                pass
+    else:
+        # Cas courant : compression et upload directement depuis la mémoire
+        gz_data = gzip.compress(pdf_path.read_bytes(), compresslevel=6)
+        # Métadonnées envoyées avec l'upload (aucun patch ensuite) ; if_generation_match=0
+        # (création uniquement) rend l'upload idempotent et donc réessayable
+        try:
+            blob.upload_from_file(
+                io.BytesIO(gz_data),
+                size=len(gz_data),
+                content_type='application/pdf',
+                checksum='crc32c',
+                if_generation_match=0
+            )
+        except PreconditionFailed:
+            # Nom unique par analyse : l'objet existe déjà, c'est un retry dont la réponse s'est perdue
+            logger.info("Synthèse déjà présente (retry après réponse perdue): %s", blob.name)
+
+def stream_analysis_with_content(temp_pdf_path, analysis_id, filename, language='fr', temp_fd=None):
+    """Stream l'analyse en temps réel à partir du PDF déjà sauvegardé, avec support multilingue"""
+    try:
+        # Analyseur partagé, utilisé par le thread d'analyse
+        analyzer = manualminer.analyzer
         
         # Vérifier que l'analyseur est disponible
-        if not manualminer.analyzer:
+        if not analyzer:
             yield send_log("error", "Analyseur non disponible - vérifiez la configuration")
             yield send_log("error", f"Statut initialisation: {manualminer.initialized}")
-            yield send_log("error", f"Analyzer object: {type(manualminer.analyzer) if manualminer.analyzer else 'None'}")
-            yield f'data: {{"type":"error"}}\n\n'
+            yield send_log("error", f"Analyzer object: {type(analyzer) if analyzer else 'None'}")
+            yield SSE_ERROR
             return
         else:
-            yield send_log("info", f"✓ Analyseur disponible: {type(manualminer.analyzer)}")
+            yield send_log("info", f"✓ Analyseur disponible: {type(analyzer)}")
             
             # Vérifier les attributs critiques de l'analyseur
-            if hasattr(manualminer.analyzer, 'doc_ai_client'):
-                yield send_log("info", f"Document AI client: {'OK' if manualminer.analyzer.doc_ai_client else 'MANQUANT'}")
-            if hasattr(manualminer.analyzer, 'gemini_model'):  
-                yield send_log("info", f"Gemini model: {'OK' if manualminer.analyzer.gemini_model else 'MANQUANT'}")
-            if hasattr(manualminer.analyzer, 'config'):
-                yield send_log("info", f"Configuration: {'OK' if manualminer.analyzer.config else 'MANQUANT'}")
+            if hasattr(analyzer, 'doc_ai_client'):
+                yield send_log("info", f"Document AI client: {'OK' if analyzer.doc_ai_client else 'MANQUANT'}")
+            if hasattr(analyzer, 'gemini_model'):  
+                yield send_log("info", f"Gemini model: {'OK' if analyzer.gemini_model else 'MANQUANT'}")
+            if hasattr(analyzer, 'config'):
+                yield send_log("info", f"Configuration: {'OK' if analyzer.config else 'MANQUANT'}")
             
         # Initialisation
         yield send_log("info", "DÉBUT ANALYSE MÉDICALE ManualMiner")
         yield send_log("info", f"Fichier reçu: {filename}")
-        yield send_log("info", f"Taille: {len(file_content)} bytes")
-        
-        # Sauvegarder le fichier temporairement
-        analysis_id = str(uuid.uuid4())
-        temp_pdf_path = manualminer.temp_dir / f"{analysis_id}_{filename}"
+        saved_size = temp_pdf_path.stat().st_size
+        yield send_log("info", f"Taille: {saved_size} bytes")
         
-        # Sauvegarder sur disque
-        try:
-            with open(temp_pdf_path, 'wb') as f:
-                f.write(file_content)
-                
-            # Vérifier que le fichier a été sauvegardé correctement
-            if not temp_pdf_path.exists() or temp_pdf_path.stat().st_size == 0:
-                yield send_log("error", "Échec de sauvegarde du fichier PDF")
-                yield f'data: {{"type":"error"}}\n\n'
-                return
-                
-        except Exception as save_error:
-            yield send_log("error", f"Erreur sauvegarde: {str(save_error)}")
-            yield f'data: {{"type":"error"}}\n\n'
-            return
-            
-        yield send_log("success", f"Fichier sauvegardé: {temp_pdf_path.name} ({temp_pdf_path.stat().st_size} bytes)")
+        yield send_log("success", f"Fichier sauvegardé: {temp_pdf_path.name} ({saved_size} bytes)")
         
         # Analyse avec la logique Python existante
         yield send_log("info", "Lancement analyse médicale exhaustive...")
         
+        # L'analyse tourne dans un thread dédié : le flux SSE envoie des keepalive
+        # pendant ce temps au lieu de rester muet plusieurs minutes
         try:
-            result = manualminer.analyzer.analyze_manual_organized(temp_pdf_path, language)
+            result = yield from run_with_keepalive(analyzer.analyze_manual_organized, temp_pdf_path, language)
         except Exception as analysis_error:
             yield send_log("error", f"Erreur lors de l'analyse: {str(analysis_error)}")
-            yield f'data: {{"type":"error"}}\n\n'
+            yield SSE_ERROR
             return
         
         if result.get("success"):
@@ -330,10 +686,10 @@ def stream_analysis_with_content(file_content, filename, language='fr'):
                     'original_filename': filename,
                     'analysis_id': analysis_id,
                     'created_by': 'ManualMiner',
-                    'created_at': datetime.now().isoformat()
+                    'created_at': iso_timestamp()
                 }
                 
-                blob.upload_from_filename(str(pdf_path))
+                yield from run_with_keepalive(upload_synthesis, blob, pdf_path)
                 yield send_log("success", f"PDF sauvegardé: {storage_filename}")
                 
                 # Statistiques
@@ -347,127 +703,181 @@ def stream_analysis_with_content(file_content, filename, language='fr'):
                 yield send_log("success", f"ID de synthèse: {analysis_id}")
                 
                 # Signal de fin avec l'ID pour le téléchargement
-                completion_data = json.dumps({
+                yield sse_event({
                     "type": "complete",
                     "analysisId": analysis_id,
                     "filename": pdf_path.name,
                     "storageFilename": storage_filename,
                     "statistics": stats
                 })
-                yield f"data: {completion_data}\n\n"
                 
             else:
                 yield send_log("error", "PDF généré non trouvé")
-                yield f'data: {{"type":"error"}}\n\n'
+                yield SSE_ERROR
         else:
             error_msg = result.get("error", "Erreur inconnue")
             yield send_log("error", f"ÉCHEC ANALYSE: {error_msg}")
-            yield f'data: {{"type":"error"}}\n\n'
+            yield SSE_ERROR
             
     except Exception as e:
-        logger.error(f"Erreur dans stream_analysis: {e}")
+        logger.error("Erreur dans stream_analysis: %s", e)
         yield send_log("error", f"ERREUR CRITIQUE: {str(e)}")
-        yield f'data: {{"type":"error"}}\n\n'
+        yield SSE_ERROR
     finally:
-        # Nettoyage
+        # Nettoyage (lien symbolique ou fichier classique, puis inode anonyme)
         try:
-            if temp_pdf_path and temp_pdf_path.exists():
+            if temp_pdf_path and (temp_pdf_path.is_symlink() or temp_pdf_path.exists()):
                 temp_pdf_path.unlink()
         except:
             pass
+        if temp_fd is not None:
+            os.close(temp_fd)
 
-def process_pdf_sync_with_content(file_content, filename, language='fr'):
+def process_pdf_sync_with_content(file_size, filename, language='fr'):
     """Traitement synchrone pour compatibilité avec support multilingue"""
     try:
-        analysis_id = str(uuid.uuid4())
+        analysis_id = new_analysis_id()
         
-        return jsonify({
+        return json_response({
             "success": True,
             "analysisId": analysis_id,
             "message": "Traitement initié - utilisez le streaming pour les logs en temps réel",
             "filename": filename,
-            "size": len(file_content),
+            "size": file_size,
             "language": language
         })
         
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return json_response({"error": str(e)}, 500)
 
 @app.route('/download/<analysis_id>', methods=['GET'])
 def download_synthesis(analysis_id: str):
     """Téléchargement d'une synthèse générée"""
     try:
         if not manualminer.storage_bucket:
-            return jsonify({"error": "Storage non disponible"}), 500
+            return json_response({"error": "Storage non disponible"}, 500)
             
         # Rechercher le fichier dans Cloud Storage
         prefix = f"syntheses/{analysis_id}/"
-        blobs = list(manualminer.storage_bucket.list_blobs(prefix=prefix))
-        
-        if not blobs:
-            return jsonify({"error": "Synthèse non trouvée"}), 404
+        blobs = manualminer.storage_bucket.list_blobs(
+            prefix=prefix,
+            max_results=10,
+            fields='items(name,metadata,contentEncoding,etag,size),nextPageToken'
+        )
         
-        # Prendre le premier PDF trouvé
+        # Prendre le premier PDF trouvé (itération paresseuse, arrêt au premier PDF)
         pdf_blob = None
+        synthesis_found = False
         for blob in blobs:
+            synthesis_found = True
             if blob.name.endswith('.pdf'):
                 pdf_blob = blob
                 break
         
+        if not synthesis_found:
+            return json_response({"error": "Synthèse non trouvée"}, 404)
+        
         if not pdf_blob:
-            return jsonify({"error": "Fichier PDF non trouvé"}), 404
+            return json_response({"error": "Fichier PDF non trouvé"}, 404)
         
-        # Télécharger le fichier temporairement
-        temp_pdf = manualminer.temp_dir / f"download_{analysis_id}.pdf"
-        pdf_blob.download_to_filename(str(temp_pdf))
+        # Requête conditionnelle : synthèse déjà détenue par le client
+        if pdf_blob.etag and request.if_none_match.contains(pdf_blob.etag):
+            response = Response(status=304)
+            response.set_etag(pdf_blob.etag)
+            response.cache_control.private = True
+            response.cache_control.max_age = DOWNLOAD_MAX_AGE
+            return response
         
         # Nom de fichier avec branding ManualMiner
-        original_filename = pdf_blob.metadata.get('original_filename', 'manuel') if pdf_blob.metadata else 'manuel'
+        original_filename = (pdf_blob.metadata or {}).get('original_filename', 'manuel')
         download_filename = original_filename.replace('.pdf', '_SYNTHESE_MANUALMINER.pdf')
         
-        return send_file(
-            str(temp_pdf),
+        # Redirection vers GCS : les octets du PDF ne transitent pas par Cloud Run
+        download_url = signed_download_url(pdf_blob, download_filename)
+        if download_url:
+            return redirect(download_url, code=302)
+        
+        is_gzipped = pdf_blob.content_encoding == 'gzip'
+        serve_gzipped = is_gzipped and 'gzip' in request.accept_encodings
+        if serve_gzipped:
+            # Le client décompresse lui-même : transmettre les octets gzip tels quels
+            blob_stream = pdf_blob.open('rb', chunk_size=GCS_CHUNK_SIZE, raw_download=True)
+        elif is_gzipped:
+            # Décompression en une seule requête (les lectures par plages ne se décompressent pas)
+            blob_stream = io.BytesIO(pdf_blob.download_as_bytes())
+        else:
+            # Streamer directement depuis Cloud Storage, sans fichier temporaire
+            blob_stream = pdf_blob.open('rb', chunk_size=GCS_CHUNK_SIZE)
+        
+        response = send_file(
+            blob_stream,
             as_attachment=True,
             download_name=download_filename,
-            mimetype='application/pdf'
+            mimetype='application/pdf',
+            max_age=DOWNLOAD_MAX_AGE
         )
+        response.cache_control.private = True
+        if not isinstance(blob_stream, io.BytesIO) and pdf_blob.size:
+            # Taille stockée connue : le client voit la progression du téléchargement
+            response.content_length = pdf_blob.size
+        if pdf_blob.etag:
+            response.set_etag(pdf_blob.etag)
+        if is_gzipped:
+            response.vary.add('Accept-Encoding')
+        if serve_gzipped:
+            response.content_encoding = 'gzip'
+        
+        return response
         
     except Exception as e:
-        logger.error(f"Erreur téléchargement {analysis_id}: {e}")
-        return jsonify({"error": f"Erreur de téléchargement: {str(e)}"}), 500
+        logger.error("Erreur téléchargement %s: %s", analysis_id, e)
+        return json_response({"error": f"Erreur de téléchargement: {str(e)}"}, 500)
 
 @app.route('/status/<analysis_id>', methods=['GET'])
 def get_analysis_status(analysis_id: str):
     """Vérifier le statut d'une analyse"""
     try:
         if not manualminer.storage_bucket:
-            return jsonify({"error": "Storage non disponible"}), 500
+            return json_response({"error": "Storage non disponible"}, 500)
             
-        prefix = f"syntheses/{analysis_id}/"
-        blobs = list(manualminer.storage_bucket.list_blobs(prefix=prefix))
+        with status_cache_lock:
+            files = status_cache.get(analysis_id)
+        
+        if files is None:
+            prefix = f"syntheses/{analysis_id}/"
+            files = tuple(blob.name for blob in manualminer.storage_bucket.list_blobs(
+                prefix=prefix,
+                fields='items(name),nextPageToken'
+            ))
+            with status_cache_lock:
+                status_cache[analysis_id] = files
         
-        if blobs:
-            return jsonify({
+        if files:
+            return json_response({
                 "status": "completed",
                 "analysisId": analysis_id,
-                "files": [blob.name for blob in blobs]
+                "files": list(files)
             })
         else:
-            return jsonify({
+            return json_response({
                 "status": "not_found",
                 "analysisId": analysis_id
             })
             
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return json_response({"error": str(e)}, 500)
 
 @app.errorhandler(404)
 def not_found(error):
-    return jsonify({"error": "Endpoint non trouvé"}), 404
+    return json_response({"error": "Endpoint non trouvé"}, 404)
+
+@app.errorhandler(413)
+def request_too_large(error):
+    return json_response({"error": "Fichier trop volumineux"}, 413)
 
 @app.errorhandler(500)
 def internal_error(error):
-    return jsonify({"error": "Erreur serveur interne"}), 500
+    return json_response({"error": "Erreur serveur interne"}, 500)
 
 if __name__ == '__main__':
     # Pour le développement local
@@ -6,107 +6,569 @@ USAGE MÉDICAL - Fiabilité critique avec Gemini 2.0 Flash + correction automati
 """
 
 import os
+import sys
 import json
+import functools
 import logging
+import logging.handlers
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+from contextlib import nullcontext
+from itertools import chain, islice
+from collections import defaultdict
+from operator import itemgetter
 from datetime import datetime
 import time
 import re
 import math
+import shutil
+import tempfile
+import uuid
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import TTLCache
 
 # Google Cloud imports
 from google.cloud import documentai
 import google.generativeai as genai
 from google.oauth2 import service_account
+from google.cloud import storage
+
+# Parsing JSON : orjson (C/Rust) si disponible, bibliothèque standard sinon.
+# orjson.JSONDecodeError hérite de json.JSONDecodeError (même .pos), les except restent valables.
+# json_dumps_indent produit le texte indenté (2 espaces) inséré dans les prompts.
+try:
+    import orjson
+    json_dumps = orjson.dumps
+    json_loads = orjson.loads
+    def json_dumps_indent(obj) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode('utf-8')
+except ImportError:
+    def json_dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+    json_loads = json.loads
+    def json_dumps_indent(obj) -> str:
+        return json.dumps(obj, ensure_ascii=False, indent=2)
 
 # Import du générateur LaTeX strict et déchiffreur
 from latex_generator import LatexSynthesisGenerator
 from pdf_decryptor import decrypt_pdf
 
 # Configuration logging stricte
+# Le fichier de log est alimenté par lots (vidage immédiat dès qu'une erreur est journalisée)
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+_log_file_handler = logging.FileHandler('lab_analysis.log', encoding='utf-8')
+_log_file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
+    format=LOG_FORMAT,
     handlers=[
-        logging.FileHandler('lab_analysis.log', encoding='utf-8'),
+        logging.handlers.MemoryHandler(capacity=1000, flushLevel=logging.ERROR, target=_log_file_handler),
         logging.StreamHandler()
     ]
 )
 logger = logging.getLogger(__name__)
 
+# Expressions compilées une fois pour la correction JSON (appelée à chaque chunk)
+_TRAILING_COMMA_RE = re.compile(r',(\s*[}\]])')
+_TRAILING_COMMA_ARRAY_RE = re.compile(r',(\s*\])')
+_REPEATED_COMMAS_RE = re.compile(r',,+')
+# Caractères de contrôle remplacés par un espace (table pour str.translate)
+_CONTROL_CHARS_TABLE = {code: ' ' for code in (*range(0x00, 0x20), *range(0x7f, 0xa0))}
+# Ligne contenant "clé": "valeur": préfixe, contenu de la valeur, dernier guillemet et suite
+_STRING_VALUE_LINE_RE = re.compile(r'^(.*?": ")(.*)(".*)$', re.MULTILINE)
+# Pré-test: au moins deux guillemets après un ": " sur la même ligne, seul cas où
+# l'échappement des valeurs peut modifier le texte
+_INNER_QUOTE_RE = re.compile(r'": "[^\n]*"[^\n]*"')
+
+# En-têtes de section insérés par merge_texts_medical (découpage en chunks d'analyse):
+# préfixe fixe recherché par str.find/str.count, fin d'en-tête après les lignes Pages/Source
+SECTION_MARKER = "=" * 80 + "\nSECTION MÉDICALE "
+SECTION_HEADER_END = "\n" + "=" * 80 + "\n\n"
+
+
+def iter_marked_sections(text: str):
+    """Génère (numéro, contenu) des sections de texte fusionné, sans leurs en-têtes.
+    
+    Le texte précédant la première section porte le numéro 0. Chaque section n'est
+    extraite qu'au moment où elle est consommée (pas de liste intermédiaire).
+    """
+    marker_pos = text.find(SECTION_MARKER)
+    yield 0, text[:marker_pos] if marker_pos >= 0 else text
+    
+    index = 0
+    while marker_pos >= 0:
+        index += 1
+        search_from = marker_pos + len(SECTION_MARKER)
+        header_end = text.find(SECTION_HEADER_END, search_from)
+        content_start = header_end + len(SECTION_HEADER_END) if header_end >= 0 else marker_pos
+        
+        marker_pos = text.find(SECTION_MARKER, max(search_from, content_start))
+        yield index, text[content_start:marker_pos if marker_pos >= 0 else len(text)]
+
+
+def _escape_value_quotes(match: re.Match) -> str:
+    """Échappe les guillemets internes d'une valeur string (ligne sans virgule/ouvrant final)"""
+    line = match.group(0)
+    if line.rstrip().endswith((',', '{', '[')):
+        return line
+    return match.group(1) + match.group(2).replace('"', '\\"') + match.group(3)
+
+
+def make_request_spacer(delay: float):
+    """Retourne une fonction (thread-safe) qui espace de `delay` secondes les départs de requêtes.
+    
+    Respecte le débit de l'ancien délai fixe entre appels sans attendre la fin de la requête précédente.
+    """
+    lock = threading.Lock()
+    next_start = [time.monotonic()]
+    
+    def wait_turn():
+        with lock:
+            now = time.monotonic()
+            wait = next_start[0] - now
+            next_start[0] = max(now, next_start[0]) + delay
+        if wait > 0:
+            time.sleep(wait)
+    
+    return wait_turn
+
+
+def nested_get(mapping, *keys, default=None):
+    """Valeur imbriquée mapping[k1][k2]... ou `default` dès qu'un niveau manque (sans dict intermédiaire)"""
+    for key in keys:
+        if not isinstance(mapping, dict) or key not in mapping:
+            return default
+        mapping = mapping[key]
+    return mapping
+
+
+# Version du prompt d'analyse: à incrémenter à chaque modification du prompt
+# pour invalider le cache des analyses Gemini
+PROMPT_VERSION = "3"
+
+# Sections requises d'une analyse de chunk et leur valeur par défaut si absentes
+ANALYSIS_LIST_SECTIONS = (
+    'procedures', 'maintenance', 'specifications_techniques', 'securite',
+    'stockage_reagents', 'calibration', 'troubleshooting'
+)
+ANALYSIS_SCALAR_SECTIONS = {'instrument': dict, 'validation_clinique': dict, 'resume_section': str}
+
+# Partie fixe du prompt d'analyse (instructions + structure JSON), placée en tête:
+# le préfixe est identique d'un appel à l'autre et peut être réutilisé par le cache
+# de préfixe de Gemini; seules les parties variables suivent
+ANALYSIS_PROMPT_PREFIX = """
+Tu es un expert médical spécialisé dans l'analyse d'instruments de laboratoire diagnostique.
+Analyse EXHAUSTIVEMENT ce manuel médical et extrait TOUTES les informations techniques et cliniques critiques.
+
+INSTRUCTIONS CRITIQUES:
+- Extrait TOUS les détails techniques, procéduraux et cliniques
+- Identifie précisément les volumes, concentrations, températures, durées
+- Capture les spécifications de performance, limites de détection, gammes linéaires
+- Relève TOUTES les précautions de sécurité, contre-indications, limitations
+- Documente les procédures complètes avec matériels exacts
+- Note les conditions de stockage, stabilité, contrôles qualité
+- Extraie les données de validation clinique et performance analytique
+
+Réponds en JSON détaillé PARFAITEMENT FORMATÉ:
+
+{
+    "instrument": {
+        "nom": "nom exact complet de l'instrument",
+        "fabricant": "fabricant exact",
+        "modele": "modèle et références exactes", 
+        "type": "type d'instrument et technologie",
+        "applications_cliniques": ["application clinique 1", "application clinique 2"],
+        "principe_technique": "principe de fonctionnement détaillé"
+    },
+    "procedures": [
+        {
+            "nom": "nom exact de l'analyse",
+            "code_produit": "référence produit si mentionnée",
+            "echantillon": {
+                "type": "type exact d'échantillon",
+                "volume_minimum": "volume minimum requis",
+                "volume_traitement": "volume de traitement",
+                "anticoagulant": "anticoagulant requis",
+                "conditions_prelevement": ["condition 1", "condition 2"]
+            },
+            "preparation_echantillon": {
+                "etapes": ["étape détaillée 1", "étape détaillée 2"],
+                "stabilite": "conditions et durées de stabilité",
+                "transport": "conditions de transport",
+                "stockage": "conditions de stockage détaillées"
+            },
+            "procedure_analytique": {
+                "etapes_detaillees": ["étape 1 avec détails", "étape 2 avec détails"],
+                "duree_totale": "durée complète du processus",
+                "temperature_incubation": "températures si applicables",
+                "cycles_pcr": "nombre de cycles si PCR",
+                "detection": "méthode de détection"
+            },
+            "materiels_reactifs": {
+                "reactifs": ["réactif 1 avec référence", "réactif 2 avec référence"],
+                "consommables": ["consommable 1", "consommable 2"],
+                "equipements": ["équipement requis"]
+            },
+            "performance": {
+                "gamme_lineaire": "gamme de mesure",
+                "limite_detection": "limite de détection",
+                "limite_quantification": "limite de quantification",
+                "precision": "données de précision",
+                "reproductibilite": "données de reproductibilité"
+            },
+            "controles_qualite": {
+                "controles_requis": ["contrôle positif", "contrôle négatif"],
+                "frequence": "fréquence des contrôles",
+                "criteres_acceptation": ["critère 1", "critère 2"]
+            },
+            "interpretation": {
+                "resultats_possibles": ["résultat 1: signification", "résultat 2: signification"],
+                "seuils_decision": "seuils cliniques importants",
+                "unites": "unités de mesure",
+                "facteur_conversion": "facteur de conversion si applicable"
+            },
+            "precautions_critiques": [
+                "précaution de sécurité 1 DÉTAILLÉE",
+                "précaution technique 2 DÉTAILLÉE"
+            ],
+            "limitations": [
+                "limitation technique 1",
+                "limitation clinique 2"
+            ]
+        }
+    ],
+    "maintenance": [
+        {
+            "type": "type exact de maintenance",
+            "frequence": "fréquence précise",
+            "duree": "temps nécessaire",
+            "procedure_complete": {
+                "preparation": ["étape préparation 1", "étape préparation 2"],
+                "execution": ["étape exécution 1 détaillée", "étape exécution 2 détaillée"],
+                "verification": ["vérification 1", "vérification 2"],
+                "documentation": "éléments à documenter"
+            },
+            "materiels_requis": ["matériel 1", "matériel 2"],
+            "personnel": "qualification du personnel",
+            "conditions_environnementales": "conditions requises"
+        }
+    ],
+    "specifications_techniques": [
+        {
+            "categorie": "catégorie technique précise",
+            "parametres": [
+                {
+                    "nom": "nom exact du paramètre",
+                    "valeur": "valeur exacte",
+                    "unite": "unité",
+                    "conditions": "conditions de mesure",
+                    "tolerance": "tolérance acceptable"
+                }
+            ]
+        }
+    ],
+    "securite": [
+        {
+            "categorie": "catégorie de risque",
+            "risques_identifies": ["risque 1 détaillé", "risque 2 détaillé"],
+            "mesures_prevention": ["mesure préventive 1", "mesure préventive 2"],
+            "equipements_protection": ["EPI requis 1", "EPI requis 2"],
+            "procedures_urgence": ["action urgence 1", "action urgence 2"],
+            "formation_requise": "formation nécessaire",
+            "reglementation": "références réglementaires"
+        }
+    ],
+    "stockage_reagents": [
+        {
+            "reagent": "nom du réactif",
+            "temperature_stockage": "température de stockage",
+            "stabilite": "durée de stabilité",
+            "conditions_speciales": ["condition 1", "condition 2"],
+            "duree_utilisation": "durée après ouverture"
+        }
+    ],
+    "validation_clinique": {
+        "population_etudiee": "population des études cliniques",
+        "nombre_echantillons": "nombre d'échantillons testés",
+        "comparaison_methodes": "méthodes de référence",
+        "sensibilite": "sensibilité analytique",
+        "specificite": "spécificité analytique",
+        "etudes_interference": "substances testées pour interférence",
+        "genotypes_detectes": "génotypes ou variants détectés"
+    },
+    "calibration": [
+        {
+            "type": "type de calibration",
+            "frequence": "fréquence recommandée",
+            "standards_utilises": ["standard 1", "standard 2"],
+            "procedure": ["étape calibration 1", "étape calibration 2"],
+            "criteres_acceptation": ["critère 1", "critère 2"],
+            "tracabilite": "traçabilité métrologique"
+        }
+    ],
+    "troubleshooting": [
+        {
+            "probleme": "problème identifié détaillé",
+            "causes_possibles": ["cause 1", "cause 2"],
+            "solutions": ["solution 1 détaillée", "solution 2 détaillée"],
+            "prevention": "mesures préventives"
+        }
+    ],
+    "resume_section": "résumé technique détaillé de cette section en 3-4 phrases"
+}
+
+CRITIQUE: Sois EXHAUSTIF, précis et technique. Capture TOUS les détails numériques, procéduraux et cliniques. ASSURE-TOI que le JSON est PARFAITEMENT VALIDE.
+"""
+
+# Catégories consolidées par la synthèse et nombre d'éléments conservés en aperçu
+# (prompt de synthèse et synthèse de secours); les totaux sont comptés à part
+SYNTHESIS_PREVIEW_SIZES = {
+    "procedures": 5, "maintenance": 6, "specifications_techniques": 2,
+    "securite": 2, "stockage_reagents": 2, "troubleshooting": 2
+}
+
+# Prompt de synthèse: parties fixes (en-tête, intitulés, structure JSON attendue) en
+# constantes, assemblées avec les aperçus des données par "".join dans synthesize_final_medical
+SYNTHESIS_PROMPT_HEADER = """
+Tu es un expert médical diagnostique. Créer une synthèse TECHNIQUE COMPLÈTE de cet instrument médical.
+
+"""
+SYNTHESIS_PROMPT_INSTRUMENT = "\n\nINFORMATIONS INSTRUMENT CONSOLIDÉES:\n"
+SYNTHESIS_PROMPT_DATA = "\n\nDONNÉES EXHAUSTIVES ANALYSÉES:\n\n"
+SYNTHESIS_PROMPT_SCHEMA = """MISSION CRITIQUE: Consolider TOUTES ces données en une synthèse technique COMPLÈTE pour usage médical professionnel. Préserver tous les détails techniques critiques (volumes, concentrations, références, limites, performances).
+
+JSON SYNTHÈSE MÉDICALE EXHAUSTIVE PARFAITEMENT FORMATÉ:
+
+{
+    "informations_generales": {
+        "nom_instrument": "nom complet consolidé avec toutes références",
+        "fabricant": "fabricant exact",
+        "modele": "modèle complet avec références produit",
+        "type_instrument": "type d'instrument et technologie précise",
+        "applications_principales": [
+            "application clinique détaillée 1 avec contexte",
+            "application clinique détaillée 2 avec contexte"
+        ],
+        "principe_fonctionnement": "principe technique détaillé de fonctionnement",
+        "approche_diagnostique": "méthodologie diagnostique et workflow"
+    },
+    "procedures_analyses": [
+        {
+            "nom_analyse": "nom complet de l'analyse avec code produit",
+            "indication_clinique": "indication médicale précise et population cible",
+            "echantillon": {
+                "type": "type d'échantillon exact avec spécifications",
+                "volume_minimum": "volume minimum avec justification",
+                "volume_traitement": "volume de traitement avec options",
+                "anticoagulant": "anticoagulant spécifique avec alternatives"
+            },
+            "preparation_detaillee": {
+                "etapes": [
+                    "étape préparation 1 avec volumes/temps précis",
+                    "étape préparation 2 avec conditions/températures"
+                ],
+                "stabilite": "conditions de stabilité complètes avec durées",
+                "stockage": "conditions de stockage détaillées par phase"
+            },
+            "procedure_analytique": {
+                "workflow": [
+                    "étape analytique 1 avec paramètres techniques",
+                    "étape analytique 2 avec conditions de traitement"
+                ],
+                "duree_totale": "temps total avec décomposition par phase",
+                "conditions_techniques": "températures, pressions, vitesses détaillées"
+            },
+            "performance_analytique": {
+                "gamme_mesure": "gamme linéaire complète avec unités",
+                "limite_detection": "LoD précise avec conditions de validation",
+                "precision": "données de précision intra et inter-série (CV%)"
+            },
+            "controles_qualite": {
+                "types_controles": [
+                    "contrôle positif haut avec concentration cible",
+                    "contrôle négatif avec critères acceptation"
+                ],
+                "frequence": "fréquence des contrôles avec justification"
+            },
+            "precautions_critiques": [
+                "SÉCURITÉ BIOLOGIQUE: manipulation échantillons infectieux avec EPI",
+                "QUALITÉ ANALYTIQUE: prévention contamination croisée"
+            ]
+        }
+    ],
+    "maintenance_preventive": [
+        {
+            "type_maintenance": "maintenance détaillée avec niveau d'intervention",
+            "frequence_precise": "fréquence exacte avec conditions déclenchantes",
+            "duree_estimee": "temps nécessaire avec marge",
+            "procedure_step_by_step": {
+                "preparation": [
+                    "préparation 1: matériels avec références"
+                ],
+                "execution": [
+                    "étape 1: procédure avec paramètres techniques"
+                ],
+                "verification": [
+                    "contrôle 1: paramètre avec limite acceptable"
+                ]
+            },
+            "materiels_specifiques": [
+                "matériel 1 avec référence et spécifications"
+            ]
+        }
+    ],
+    "guide_utilisation_quotidienne": {
+        "demarrage_systeme": [
+            "startup 1: vérifications préalables avec check-list",
+            "startup 2: initialisation avec paramètres de contrôle"
+        ],
+        "arret_systeme": [
+            "shutdown 1: finalisation analyses en cours avec sauvegarde",
+            "shutdown 2: mise en sécurité avec vérifications"
+        ],
+        "maintenance_quotidienne": [
+            "tâche quotidienne 1: contrôles de routine avec documentation"
+        ]
+    },
+    "resume_executif": "Résumé technique et clinique EXHAUSTIF de l'instrument couvrant: technologie utilisée, applications cliniques principales, performances analytiques clés, exigences d'utilisation, considérations de maintenance et points critiques de sécurité pour usage médical professionnel"
+}
+
+EXIGENCE ABSOLUE: JSON PARFAITEMENT VALIDE. Consolide EXHAUSTIVEMENT toutes les données en préservant les détails techniques critiques."""
+
+# Budget de tokens du prompt d'analyse (préfixe + parties variables + texte de section);
+# analysis.max_prompt_tokens le remplace, la réserve couvre langue, contexte et description.
+# Défaut proche de l'ancienne coupe (préfixe ~2k tokens + 80k caractères ~20k tokens)
+DEFAULT_MAX_PROMPT_TOKENS = 24000
+PROMPT_VARIABLE_RESERVE_TOKENS = 1000
+# Troncature historique en caractères si le comptage de tokens échoue
+FALLBACK_MAX_TEXT_CHARS = 80000
+
+# Dernier test de connexion APIs réussi: évite de refaire les appels de test
+# (list_processors + génération Gemini) à chaque instanciation
+API_PROBE_CACHE = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "lab_analyzer" / "api_ok.json"
+API_PROBE_TTL = 900  # secondes
+
+# Cache des résultats Document AI / Gemini (analysis.cache, désactivé par défaut):
+# durée de vie et taille disque maximales (analysis.cache_ttl / analysis.cache_max_bytes),
+# plus un niveau mémoire borné devant les fichiers
+DEFAULT_CACHE_TTL = 7 * 24 * 3600  # secondes
+DEFAULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+CACHE_MEMORY_ENTRIES = 64
+
+# Mode JSON natif de Gemini: la sortie est du JSON syntaxiquement valide côté serveur,
+# la correction (regex puis second appel Gemini) ne sert plus qu'en dernier recours
+JSON_GENERATION_CONFIG = {"response_mime_type": "application/json"}
+
 class LabManualAnalyzerStrict:
     """Analyseur STRICT pour matériel médical avec double validation JSON"""
     
-    def __init__(self, config_path: str = "config.json"):
-        """Initialise l'analyseur avec vérifications strictes"""
+    def __init__(self, config_path: str = "config.json", config: Optional[Dict] = None, force_probe: bool = False):
+        """Initialise l'analyseur avec vérifications strictes (config déjà parsée optionnelle)"""
         logger.info("🏥 INITIALISATION ANALYSEUR MÉDICAL STRICT")
         
-        self.config = self.load_config(config_path)
+        self.force_probe = force_probe
+        self.config = self.validate_config(config) if config is not None else self.load_config(config_path)
+        
+        # Valeurs de configuration lues dans les boucles, résolues une seule fois
+        google_cloud = self.config["google_cloud"]
+        analysis = self.config["analysis"]
+        self.creds_path = Path(google_cloud["credentials_path"])
+        self.batch_bucket = google_cloud.get("batch_bucket")
+        self.request_delay = analysis["delay_between_requests"]
+        self.concurrency = analysis.get("concurrency", 8)
+        self.max_parallel_analyses = analysis.get("max_parallel", 1)
+        self.cache_enabled = analysis.get("cache", False)
+        self.cache_ttl = analysis.get("cache_ttl", DEFAULT_CACHE_TTL)
+        self.cache_max_bytes = analysis.get("cache_max_bytes", DEFAULT_CACHE_MAX_BYTES)
+        self.memory_cache = TTLCache(maxsize=CACHE_MEMORY_ENTRIES, ttl=self.cache_ttl)
+        self.memory_cache_lock = threading.Lock()
+        self.max_prompt_tokens = analysis.get("max_prompt_tokens", DEFAULT_MAX_PROMPT_TOKENS)
+        self.gemini_model_name = self.config["gemini"]["model"]
+        
         self.setup_google_apis()
         self.setup_output_directories()
         
+        # Tokens du préfixe de prompt, par modèle (voir fit_text_to_token_budget)
+        self.prefix_token_counts = {}
+        
         # Limite Document AI stricte
         self.max_pages_per_request = 15
-        logger.info(f"📄 Limite Document AI: {self.max_pages_per_request} pages par requête")
+        logger.info("📄 Limite Document AI: %d pages par requête", self.max_pages_per_request)
         
         # Initialiser le générateur LaTeX STRICT
         try:
             self.latex_generator = LatexSynthesisGenerator()
             logger.info("✅ Générateur LaTeX médical initialisé et vérifié")
         except Exception as e:
-            logger.error(f"❌ ERREUR CRITIQUE: Générateur LaTeX non opérationnel")
+            logger.error("❌ ERREUR CRITIQUE: Générateur LaTeX non opérationnel")
             raise RuntimeError(f"Impossible d'initialiser le générateur LaTeX: {e}")
     
-    def load_config(self, config_path: str) -> Dict:
-        """Charge et valide la configuration de manière stricte"""
+    @classmethod
+    def from_dict(cls, config: Dict) -> "LabManualAnalyzerStrict":
+        """Crée un analyseur à partir d'une configuration déjà parsée (sans relire le fichier)"""
+        return cls(config=config)
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=4)
+    def load_config(config_path: str) -> Dict:
+        """Charge et valide la configuration de manière stricte (mémorisée par chemin)"""
         if not Path(config_path).exists():
             raise FileNotFoundError(f"❌ Fichier de configuration manquant: {config_path}")
         
         try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-            
-            # Validation stricte de la configuration
-            required_sections = {
-                "google_cloud": ["project_id", "location", "processor_id", "credentials_path"],
-                "gemini": ["api_key", "model"],
-                "analysis": ["delay_between_requests"]
-            }
-            
-            for section, keys in required_sections.items():
-                if section not in config:
-                    raise ValueError(f"❌ Section manquante dans config: {section}")
-                
-                for key in keys:
-                    if key not in config[section] or not config[section][key]:
-                        raise ValueError(f"❌ Clé manquante ou vide: {section}.{key}")
-            
-            # Vérifier le fichier de credentials
-            creds_path = Path(config["google_cloud"]["credentials_path"])
-            if not creds_path.exists():
-                raise FileNotFoundError(f"❌ Fichier credentials manquant: {creds_path}")
-            
-            logger.info("✅ Configuration validée")
-            return config
-            
+            with open(config_path, 'rb') as f:
+                config = json_loads(f.read())
         except json.JSONDecodeError as e:
             raise ValueError(f"❌ Configuration JSON invalide: {e}")
+        
+        return LabManualAnalyzerStrict.validate_config(config)
+    
+    @staticmethod
+    def validate_config(config: Dict) -> Dict:
+        """Valide la configuration de manière stricte"""
+        required_sections = {
+            "google_cloud": ["project_id", "location", "processor_id", "credentials_path"],
+            "gemini": ["api_key", "model"],
+            "analysis": ["delay_between_requests"]
+        }
+        
+        for section, keys in required_sections.items():
+            if section not in config:
+                raise ValueError(f"❌ Section manquante dans config: {section}")
+            
+            for key in keys:
+                if key not in config[section] or not config[section][key]:
+                    raise ValueError(f"❌ Clé manquante ou vide: {section}.{key}")
+        
+        # Vérifier le fichier de credentials
+        creds_path = Path(config["google_cloud"]["credentials_path"])
+        if not creds_path.exists():
+            raise FileNotFoundError(f"❌ Fichier credentials manquant: {creds_path}")
+        
+        logger.info("✅ Configuration validée")
+        return config
     
     def setup_output_directories(self):
         """Crée la structure de dossiers avec vérifications"""
         self.manuels_dir = Path("manuels")
         self.syntheses_dir = self.manuels_dir / "syntheses"
         self.temp_dir = Path("temp")
+        # Cache sous temp/ sauf chemin explicite (analysis.cache_dir), créé seulement s'il est activé
+        cache_dir = self.config["analysis"].get("cache_dir")
+        self.cache_dir = Path(cache_dir) if cache_dir else self.temp_dir / "cache"
+        directories = [self.manuels_dir, self.syntheses_dir, self.temp_dir]
+        if self.cache_enabled:
+            directories.append(self.cache_dir)
         
         try:
-            for directory in [self.manuels_dir, self.syntheses_dir, self.temp_dir]:
-                directory.mkdir(exist_ok=True)
+            for directory in directories:
+                directory.mkdir(parents=True, exist_ok=True)
                 
                 # Vérifier les permissions d'écriture
-                test_file = directory / "test_write_permission.tmp"
-                test_file.write_text("test")
-                test_file.unlink()
+                if not os.access(directory, os.W_OK):
+                    raise PermissionError(f"écriture interdite dans {directory}")
             
             logger.info("✅ Structure de dossiers validée avec permissions d'écriture")
             
@@ -117,8 +579,9 @@ class LabManualAnalyzerStrict:
         """Configure les APIs Google Cloud avec vérifications strictes"""
         try:
             credentials = service_account.Credentials.from_service_account_file(
-                self.config["google_cloud"]["credentials_path"]
+                str(self.creds_path)
             )
+            self.credentials = credentials
             
             region = self.config["google_cloud"]["location"]
             if region == "eu":
@@ -136,7 +599,7 @@ class LabManualAnalyzerStrict:
             
             # Configuration Gemini stricte
             genai.configure(api_key=self.config["gemini"]["api_key"])
-            self.gemini_model = genai.GenerativeModel(self.config["gemini"]["model"])
+            self.gemini_model = genai.GenerativeModel(self.gemini_model_name)
             
             # Essayer d'utiliser Gemini 2.0 Flash si disponible
             try:
@@ -154,8 +617,30 @@ class LabManualAnalyzerStrict:
         except Exception as e:
             raise RuntimeError(f"❌ Échec configuration APIs: {e}")
     
+    def api_probe_key(self) -> str:
+        """Empreinte de la configuration testée (credentials, processeur, modèle)"""
+        google_cloud = self.config["google_cloud"]
+        gemini = self.config["gemini"]
+        return hashlib.sha256("\0".join((
+            str(self.creds_path.resolve()),
+            google_cloud["project_id"], google_cloud["location"], google_cloud["processor_id"],
+            gemini["api_key"], gemini["model"]
+        )).encode('utf-8')).hexdigest()
+    
     def test_api_connections(self):
-        """Test obligatoire des connexions APIs"""
+        """Test obligatoire des connexions APIs (mémorisé API_PROBE_TTL secondes)"""
+        probe_key = self.api_probe_key()
+        
+        if not self.force_probe:
+            try:
+                with open(API_PROBE_CACHE, 'rb') as f:
+                    last_probe = json_loads(f.read())
+                if last_probe.get("hash") == probe_key and time.time() - last_probe.get("ts", 0) < API_PROBE_TTL:
+                    logger.info("✅ Connexions APIs testées récemment - test ignoré")
+                    return
+            except (OSError, ValueError):
+                pass
+        
         try:
             # Test Document AI
             parent = f"projects/{self.config['google_cloud']['project_id']}/locations/{self.config['google_cloud']['location']}"
@@ -178,9 +663,104 @@ class LabManualAnalyzerStrict:
             
         except Exception as e:
             raise RuntimeError(f"❌ Test de connexion échoué: {e}")
+        
+        try:
+            API_PROBE_CACHE.parent.mkdir(parents=True, exist_ok=True)
+            API_PROBE_CACHE.write_bytes(json_dumps({"hash": probe_key, "ts": time.time()}))
+        except OSError as e:
+            logger.warning("⚠️ Mémorisation du test de connexion impossible: %s", e)
+    
+    def cache_get(self, namespace: str, key: str) -> Optional[Dict]:
+        """Lit une entrée du cache (mémoire puis disque; None si absente, expirée ou cache désactivé)"""
+        if not self.cache_enabled:
+            return None
+        
+        memory_key = (namespace, key)
+        with self.memory_cache_lock:
+            value = self.memory_cache.get(memory_key)
+        if value is not None:
+            return value
+        
+        cache_file = self.cache_dir / namespace / f"{key}.json"
+        try:
+            with open(cache_file, 'rb') as f:
+                expired = time.time() - os.fstat(f.fileno()).st_mtime > self.cache_ttl
+                if not expired:
+                    value = json_loads(f.read())
+        except FileNotFoundError:
+            return None
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning("⚠️ Entrée de cache illisible ignorée: %s (%s)", cache_file.name, e)
+            return None
+        
+        if expired:
+            cache_file.unlink(missing_ok=True)
+            return None
+        
+        with self.memory_cache_lock:
+            self.memory_cache[memory_key] = value
+        return value
     
-    def prepare_pdf(self, pdf_path: Path) -> Path:
-        """Prépare le PDF avec vérifications strictes"""
+    def cache_put(self, namespace: str, key: str, value: Dict):
+        """Écrit une entrée du cache disque de manière atomique, puis applique durée de vie et taille max"""
+        if not self.cache_enabled:
+            return
+        
+        with self.memory_cache_lock:
+            self.memory_cache[(namespace, key)] = value
+        
+        cache_subdir = self.cache_dir / namespace
+        try:
+            cache_subdir.mkdir(parents=True, exist_ok=True)
+            tmp_file = cache_subdir / f"{key}.{uuid.uuid4().hex}.tmp"
+            with open(tmp_file, 'wb') as f:
+                f.write(json_dumps(value))
+            os.replace(tmp_file, cache_subdir / f"{key}.json")
+        except OSError as e:
+            logger.warning("⚠️ Écriture cache impossible (%s/%s): %s", namespace, key[:12], e)
+            return
+        
+        self.evict_cache()
+    
+    def evict_cache(self):
+        """Supprime les entrées expirées, puis les plus anciennes tant que le cache dépasse cache_max_bytes"""
+        now = time.time()
+        entries = []
+        total_size = 0
+        try:
+            for namespace_dir in os.scandir(self.cache_dir):
+                if not namespace_dir.is_dir():
+                    continue
+                for entry in os.scandir(namespace_dir.path):
+                    try:
+                        stat = entry.stat()
+                        if now - stat.st_mtime > self.cache_ttl:
+                            os.unlink(entry.path)
+                            continue
+                    except OSError:
+                        # Entrée supprimée entre-temps par un autre thread
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total_size += stat.st_size
+        except OSError as e:
+            logger.warning("⚠️ Parcours du cache impossible: %s", e)
+            return
+        
+        if total_size <= self.cache_max_bytes:
+            return
+        
+        entries.sort()
+        for _, size, path in entries:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            total_size -= size
+            if total_size <= self.cache_max_bytes:
+                break
+    
+    def prepare_pdf(self, pdf_path: Path) -> Tuple[Path, "pikepdf.Pdf"]:
+        """Prépare le PDF avec vérifications strictes (retourne le chemin et le PDF ouvert)"""
         if not pdf_path.exists():
             raise FileNotFoundError(f"❌ PDF non trouvé: {pdf_path}")
         
@@ -188,331 +768,347 @@ class LabManualAnalyzerStrict:
             raise ValueError(f"❌ PDF vide: {pdf_path}")
         
         try:
-            import PyPDF2
+            import pikepdf
             
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                
-                if pdf_reader.is_encrypted:
-                    logger.info(f"🔒 PDF chiffré détecté: {pdf_path.name}")
-                    decrypted_path = self.temp_dir / f"decrypted_{pdf_path.name}"
-                    
-                    if not decrypt_pdf(pdf_path, decrypted_path):
-                        raise RuntimeError(f"❌ Impossible de déchiffrer: {pdf_path}")
-                    
-                    logger.info(f"🔓 PDF déchiffré: {decrypted_path}")
-                    return decrypted_path
-                else:
-                    logger.info(f"📄 PDF non chiffré: {pdf_path.name}")
-                    return pdf_path
+            # pikepdf ouvre d'office les PDFs chiffrés sans mot de passe utilisateur
+            try:
+                pdf = pikepdf.open(pdf_path)
+            except pikepdf.PasswordError:
+                pdf = None
+            
+            if pdf is not None and not pdf.is_encrypted:
+                logger.info("📄 PDF non chiffré: %s", pdf_path.name)
+                # Le PDF déjà analysé est réutilisé pour le découpage
+                return pdf_path, pdf
+            
+            if pdf is not None:
+                pdf.close()
+            
+            logger.info("🔒 PDF chiffré détecté: %s", pdf_path.name)
+            decrypted_path = self.temp_dir / f"decrypted_{pdf_path.name}"
+            
+            if not decrypt_pdf(pdf_path, decrypted_path):
+                raise RuntimeError(f"❌ Impossible de déchiffrer: {pdf_path}")
+            
+            logger.info("🔓 PDF déchiffré: %s", decrypted_path)
+            return decrypted_path, pikepdf.open(decrypted_path)
                     
         except ImportError:
-            raise RuntimeError("❌ PyPDF2 non installé - requis pour validation PDF")
+            raise RuntimeError("❌ pikepdf non installé - requis pour validation PDF")
         except Exception as e:
             raise RuntimeError(f"❌ Erreur préparation PDF: {e}")
     
-    def split_pdf_15pages(self, pdf_path: Path) -> List[Path]:
-        """Divise PDF en chunks stricts de 15 pages maximum"""
+    def split_pdf_15pages(self, pdf_path: Path, source_pdf: Optional["pikepdf.Pdf"] = None) -> List[Path]:
+        """Divise PDF en chunks stricts de 15 pages maximum (réutilise source_pdf s'il est déjà ouvert)"""
+        if self.batch_bucket:
+            # Le mode batch Document AI pagine côté serveur: pas de découpage local
+            logger.info("📄 Mode batch - PDF complet envoyé sans découpage")
+            return [pdf_path]
+        
+        chunks_dir = None
         try:
-            import PyPDF2
+            import pikepdf
             
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                total_pages = len(pdf_reader.pages)
+            # Une seule analyse du PDF source; les pages sont clonées par libqpdf
+            with (nullcontext(source_pdf) if source_pdf is not None else pikepdf.open(pdf_path)) as src:
+                total_pages = len(src.pages)
                 
                 if total_pages == 0:
                     raise ValueError("❌ PDF sans pages")
                 
-                logger.info(f"📊 PDF: {total_pages} pages à traiter")
+                logger.info("📊 PDF: %d pages à traiter", total_pages)
                 
                 if total_pages <= self.max_pages_per_request:
                     logger.info("📄 PDF petit - traitement direct")
                     return [pdf_path]
                 
                 # Découpage strict
-                chunks_dir = self.temp_dir / f"{pdf_path.stem}_chunks"
-                chunks_dir.mkdir(exist_ok=True)
+                # Dossier propre à cette exécution: la suppression en arrière-plan d'une exécution
+                # précédente (même fichier ou même nom) ne peut pas toucher ces chunks
+                chunks_dir = Path(tempfile.mkdtemp(prefix=f"{pdf_path.stem}_chunks_", dir=self.temp_dir))
                 
                 chunks = []
                 pages_per_chunk = self.max_pages_per_request
                 num_chunks = math.ceil(total_pages / pages_per_chunk)
                 
-                logger.info(f"✂️ Découpage en {num_chunks} chunks de {pages_per_chunk} pages max")
+                logger.info("✂️ Découpage en %d chunks de %d pages max", num_chunks, pages_per_chunk)
                 
                 for i in range(num_chunks):
                     start_page = i * pages_per_chunk
                     end_page = min(start_page + pages_per_chunk, total_pages)
                     
-                    pdf_writer = PyPDF2.PdfWriter()
-                    
-                    for page_num in range(start_page, end_page):
-                        pdf_writer.add_page(pdf_reader.pages[page_num])
-                    
-                    chunk_path = chunks_dir / f"chunk_{i+1:02d}_p{start_page+1}-{end_page}.pdf"
-                    
-                    with open(chunk_path, 'wb') as output_file:
-                        pdf_writer.write(output_file)
-                    
-                    # Vérification chunk créé
-                    if not chunk_path.exists() or chunk_path.stat().st_size == 0:
-                        raise RuntimeError(f"❌ Échec création chunk: {chunk_path}")
-                    
-                    chunks.append(chunk_path)
-                    logger.info(f"✅ Chunk {i+1}: {end_page - start_page} pages")
-                
-                return chunks
-                
-        except Exception as e:
-            raise RuntimeError(f"❌ Échec découpage PDF: {e}")
-    
-    def extract_text_safe(self, pdf_path: Path, max_retries: int = 2) -> Dict:
-        """Extraction de texte avec validation stricte"""
-        for attempt in range(max_retries):
-            try:
-                logger.info(f"🔍 Extraction: {pdf_path.name} (tentative {attempt + 1})")
-                
-                with open(pdf_path, "rb") as pdf_file:
-                    pdf_content = pdf_file.read()
-                
-                file_size_mb = len(pdf_content) / (1024 * 1024)
-                logger.info(f"📊 Taille: {file_size_mb:.1f} MB")
-                
-                # Limite stricte de taille
-                if len(pdf_content) > 20 * 1024 * 1024:
-                    raise ValueError("❌ Fichier trop volumineux (>20MB)")
-                
-                if len(pdf_content) == 0:
-                    raise ValueError("❌ Fichier vide")
-                
-                raw_document = documentai.RawDocument(
-                    content=pdf_content,
-                    mime_type="application/pdf"
-                )
-                
-                request = documentai.ProcessRequest(
-                    name=self.processor_name,
-                    raw_document=raw_document
-                )
-                
-                result = self.doc_ai_client.process_document(request=request)
-                document = result.document
-                
-                # Validation stricte du résultat
-                if not document or not document.text:
-                    raise ValueError("❌ Document AI n'a extrait aucun texte")
-                
-                char_count = len(document.text)
-                page_count = len(document.pages) if document.pages else 0
-                
-                # Validation minimale du contenu
-                if char_count < 100:  # Trop peu de texte = problème
-                    raise ValueError(f"❌ Texte extrait insuffisant: {char_count} caractères")
-                
-                logger.info(f"✅ Extraction réussie: {char_count:,} caractères, {page_count} pages")
-                
-                return {
-                    "text": document.text,
-                    "pages": page_count,
-                    "chunk_file": str(pdf_path),
-                    "char_count": char_count
-                }
-                
-            except Exception as e:
-                logger.warning(f"⚠️ Tentative {attempt + 1} échouée: {str(e)[:200]}")
-                
-                if attempt < max_retries - 1:
-                    wait_time = (attempt + 1) * 3
-                    logger.info(f"⏳ Attente {wait_time}s avant nouvelle tentative...")
-                    time.sleep(wait_time)
-                else:
-                    # Échec définitif
-                    error_msg = f"❌ ÉCHEC DÉFINITIF extraction: {pdf_path.name} - {e}"
-                    logger.error(error_msg)
-                    raise RuntimeError(error_msg)
-    
-    def analyze_with_gemini_advanced(self, chunk: Dict, context: str = "", language: str = 'fr') -> Dict:
-        """Analyse Gemini AVANCÉE avec modèle intelligent et double validation et support multilingue"""
-        
-        # Instructions de langue pour le prompt
-        language_instruction = {
-            'fr': "IMPORTANT: Réponds EXCLUSIVEMENT en français avec tous les textes, descriptions et valeurs en français.",
-            'en': "IMPORTANT: Respond EXCLUSIVELY in English with all texts, descriptions and values in English."
-        }
-        
-        lang_inst = language_instruction.get(language, language_instruction['fr'])
-        
-        # Prompt détaillé pour extraction maximale d'informations
-        detailed_prompt = f"""
-Tu es un expert médical spécialisé dans l'analyse d'instruments de laboratoire diagnostique.
-Analyse EXHAUSTIVEMENT ce manuel médical et extrait TOUTES les informations techniques et cliniques critiques.
-
-{lang_inst}
-
-CONTEXTE PRÉCÉDENT: {context[-300:] if context else "Début du document"}
-
-SECTION À ANALYSER: {chunk['description']} ({chunk['char_count']} caractères)
-
-INSTRUCTIONS CRITIQUES:
-- Extrait TOUS les détails techniques, procéduraux et cliniques
-- Identifie précisément les volumes, concentrations, températures, durées
-- Capture les spécifications de performance, limites de détection, gammes linéaires
-- Relève TOUTES les précautions de sécurité, contre-indications, limitations
-- Documente les procédures complètes avec matériels exacts
-- Note les conditions de stockage, stabilité, contrôles qualité
-- Extraie les données de validation clinique et performance analytique
-
-TEXTE À ANALYSER:
-{chunk['text'][:80000]}
-
-Réponds en JSON détaillé PARFAITEMENT FORMATÉ:
-
-{{
-    "instrument": {{
-        "nom": "nom exact complet de l'instrument",
-        "fabricant": "fabricant exact",
-        "modele": "modèle et références exactes", 
-        "type": "type d'instrument et technologie",
-        "applications_cliniques": ["application clinique 1", "application clinique 2"],
-        "principe_technique": "principe de fonctionnement détaillé"
-    }},
-    "procedures": [
-        {{
-            "nom": "nom exact de l'analyse",
-            "code_produit": "référence produit si mentionnée",
-            "echantillon": {{
-                "type": "type exact d'échantillon",
-                "volume_minimum": "volume minimum requis",
-                "volume_traitement": "volume de traitement",
-                "anticoagulant": "anticoagulant requis",
-                "conditions_prelevement": ["condition 1", "condition 2"]
-            }},
-            "preparation_echantillon": {{
-                "etapes": ["étape détaillée 1", "étape détaillée 2"],
-                "stabilite": "conditions et durées de stabilité",
-                "transport": "conditions de transport",
-                "stockage": "conditions de stockage détaillées"
-            }},
-            "procedure_analytique": {{
-                "etapes_detaillees": ["étape 1 avec détails", "étape 2 avec détails"],
-                "duree_totale": "durée complète du processus",
-                "temperature_incubation": "températures si applicables",
-                "cycles_pcr": "nombre de cycles si PCR",
-                "detection": "méthode de détection"
-            }},
-            "materiels_reactifs": {{
-                "reactifs": ["réactif 1 avec référence", "réactif 2 avec référence"],
-                "consommables": ["consommable 1", "consommable 2"],
-                "equipements": ["équipement requis"]
-            }},
-            "performance": {{
-                "gamme_lineaire": "gamme de mesure",
-                "limite_detection": "limite de détection",
-                "limite_quantification": "limite de quantification",
-                "precision": "données de précision",
-                "reproductibilite": "données de reproductibilité"
-            }},
-            "controles_qualite": {{
-                "controles_requis": ["contrôle positif", "contrôle négatif"],
-                "frequence": "fréquence des contrôles",
-                "criteres_acceptation": ["critère 1", "critère 2"]
-            }},
-            "interpretation": {{
-                "resultats_possibles": ["résultat 1: signification", "résultat 2: signification"],
-                "seuils_decision": "seuils cliniques importants",
-                "unites": "unités de mesure",
-                "facteur_conversion": "facteur de conversion si applicable"
-            }},
-            "precautions_critiques": [
-                "précaution de sécurité 1 DÉTAILLÉE",
-                "précaution technique 2 DÉTAILLÉE"
-            ],
-            "limitations": [
-                "limitation technique 1",
-                "limitation clinique 2"
-            ]
-        }}
-    ],
-    "maintenance": [
-        {{
-            "type": "type exact de maintenance",
-            "frequence": "fréquence précise",
-            "duree": "temps nécessaire",
-            "procedure_complete": {{
-                "preparation": ["étape préparation 1", "étape préparation 2"],
-                "execution": ["étape exécution 1 détaillée", "étape exécution 2 détaillée"],
-                "verification": ["vérification 1", "vérification 2"],
-                "documentation": "éléments à documenter"
-            }},
-            "materiels_requis": ["matériel 1", "matériel 2"],
-            "personnel": "qualification du personnel",
-            "conditions_environnementales": "conditions requises"
-        }}
-    ],
-    "specifications_techniques": [
-        {{
-            "categorie": "catégorie technique précise",
-            "parametres": [
-                {{
-                    "nom": "nom exact du paramètre",
-                    "valeur": "valeur exacte",
-                    "unite": "unité",
-                    "conditions": "conditions de mesure",
-                    "tolerance": "tolérance acceptable"
-                }}
-            ]
-        }}
-    ],
-    "securite": [
-        {{
-            "categorie": "catégorie de risque",
-            "risques_identifies": ["risque 1 détaillé", "risque 2 détaillé"],
-            "mesures_prevention": ["mesure préventive 1", "mesure préventive 2"],
-            "equipements_protection": ["EPI requis 1", "EPI requis 2"],
-            "procedures_urgence": ["action urgence 1", "action urgence 2"],
-            "formation_requise": "formation nécessaire",
-            "reglementation": "références réglementaires"
-        }}
-    ],
-    "stockage_reagents": [
-        {{
-            "reagent": "nom du réactif",
-            "temperature_stockage": "température de stockage",
-            "stabilite": "durée de stabilité",
-            "conditions_speciales": ["condition 1", "condition 2"],
-            "duree_utilisation": "durée après ouverture"
-        }}
-    ],
-    "validation_clinique": {{
-        "population_etudiee": "population des études cliniques",
-        "nombre_echantillons": "nombre d'échantillons testés",
-        "comparaison_methodes": "méthodes de référence",
-        "sensibilite": "sensibilité analytique",
-        "specificite": "spécificité analytique",
-        "etudes_interference": "substances testées pour interférence",
-        "genotypes_detectes": "génotypes ou variants détectés"
-    }},
-    "calibration": [
-        {{
-            "type": "type de calibration",
-            "frequence": "fréquence recommandée",
-            "standards_utilises": ["standard 1", "standard 2"],
-            "procedure": ["étape calibration 1", "étape calibration 2"],
-            "criteres_acceptation": ["critère 1", "critère 2"],
-            "tracabilite": "traçabilité métrologique"
-        }}
-    ],
-    "troubleshooting": [
-        {{
-            "probleme": "problème identifié détaillé",
-            "causes_possibles": ["cause 1", "cause 2"],
-            "solutions": ["solution 1 détaillée", "solution 2 détaillée"],
-            "prevention": "mesures préventives"
-        }}
-    ],
-    "resume_section": "résumé technique détaillé de cette section en 3-4 phrases"
-}}
-
-CRITIQUE: Sois EXHAUSTIF, précis et technique. Capture TOUS les détails numériques, procéduraux et cliniques. ASSURE-TOI que le JSON est PARFAITEMENT VALIDE."""
+                    chunk_path = chunks_dir / f"chunk_{i+1:02d}_p{start_page+1}-{end_page}.pdf"
+                    
+                    with pikepdf.Pdf.new() as dst:
+                        dst.pages.extend(src.pages[start_page:end_page])
+                        dst.save(chunk_path)
+                    
+                    # Vérification chunk créé
+                    if not chunk_path.exists() or chunk_path.stat().st_size == 0:
+                        raise RuntimeError(f"❌ Échec création chunk: {chunk_path}")
+                    
+                    chunks.append(chunk_path)
+                    logger.info("✅ Chunk %d: %d pages", i + 1, end_page - start_page)
+                
+                return chunks
+                
+        except Exception as e:
+            # Dossier propre à cette exécution: les chunks partiels ne servent à rien
+            if chunks_dir is not None:
+                shutil.rmtree(chunks_dir, ignore_errors=True)
+            raise RuntimeError(f"❌ Échec découpage PDF: {e}")
+    
+    def extract_text_safe(self, pdf_path: Path, max_retries: int = 2) -> Dict:
+        """Extraction de texte avec validation stricte"""
+        for attempt in range(max_retries):
+            try:
+                logger.info("🔍 Extraction: %s (tentative %d)", pdf_path.name, attempt + 1)
+                
+                # Taille vérifiée avant toute lecture du fichier
+                file_size = pdf_path.stat().st_size
+                file_size_mb = file_size / (1024 * 1024)
+                logger.info("📊 Taille: %.1f MB", file_size_mb)
+                
+                # Limite stricte de taille
+                if file_size > 20 * 1024 * 1024:
+                    raise ValueError("❌ Fichier trop volumineux (>20MB)")
+                
+                if file_size == 0:
+                    raise ValueError("❌ Fichier vide")
+                
+                # Lecture unique: les mêmes octets servent au hash du cache et à la requête
+                # (le message protobuf en garde sa propre copie)
+                pdf_content = pdf_path.read_bytes()
+                
+                # Même processeur Document AI déjà appliqué sur ces mêmes octets: réutiliser le résultat
+                digest = hashlib.sha256(f"{self.processor_name}\0".encode('utf-8'))
+                digest.update(pdf_content)
+                cache_key = digest.hexdigest()
+                cached = self.cache_get("documentai", cache_key)
+                if cached is not None:
+                    logger.info("♻️ Extraction en cache: %d caractères, %s pages", cached['char_count'], cached['pages'])
+                    return {**cached, "chunk_file": str(pdf_path)}
+                
+                request = documentai.ProcessRequest(
+                    name=self.processor_name,
+                    raw_document=documentai.RawDocument(
+                        content=pdf_content,
+                        mime_type="application/pdf"
+                    )
+                )
+                del pdf_content
+                
+                result = self.doc_ai_client.process_document(request=request)
+                document = result.document
+                
+                # document.text est reconverti depuis le protobuf à chaque accès: une seule lecture,
+                # puis la réponse (texte, pages, entités) est libérée au plus tôt
+                text = document.text if document else ""
+                page_count = len(document.pages) if document else 0
+                del result, document
+                
+                # Validation stricte du résultat
+                if not text:
+                    raise ValueError("❌ Document AI n'a extrait aucun texte")
+                
+                char_count = len(text)
+                
+                # Validation minimale du contenu
+                if char_count < 100:  # Trop peu de texte = problème
+                    raise ValueError(f"❌ Texte extrait insuffisant: {char_count} caractères")
+                
+                logger.info("✅ Extraction réussie: %d caractères, %d pages", char_count, page_count)
+                
+                extraction = {
+                    "text": text,
+                    "pages": page_count,
+                    "char_count": char_count
+                }
+                self.cache_put("documentai", cache_key, extraction)
+                
+                return {**extraction, "chunk_file": str(pdf_path)}
+                
+            except Exception as e:
+                logger.warning("⚠️ Tentative %d échouée: %s", attempt + 1, str(e)[:200])
+                
+                if attempt < max_retries - 1:
+                    wait_time = (attempt + 1) * 3
+                    logger.info("⏳ Attente %ds avant nouvelle tentative...", wait_time)
+                    time.sleep(wait_time)
+                else:
+                    # Échec définitif
+                    error_msg = f"❌ ÉCHEC DÉFINITIF extraction: {pdf_path.name} - {e}"
+                    logger.error(error_msg)
+                    raise RuntimeError(error_msg)
+    
+    def extract_texts_concurrent(self, pdf_chunks: List[Path]) -> List[Dict]:
+        """Extraction concurrente des chunks (concurrence bornée, départs espacés pour les quotas)"""
+        concurrency = max(1, min(self.concurrency, len(pdf_chunks)))
+        wait_turn = make_request_spacer(self.request_delay)
+        
+        def extract(indexed_chunk):
+            i, chunk_pdf = indexed_chunk
+            wait_turn()
+            logger.info("🔍 Extraction chunk %d/%d", i + 1, len(pdf_chunks))
+            return self.extract_text_safe(chunk_pdf)
+        
+        logger.info("⚡ Extraction de %d chunks (%d en parallèle)", len(pdf_chunks), concurrency)
+        
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            # map conserve l'ordre des chunks et propage la première erreur
+            return list(executor.map(extract, enumerate(pdf_chunks)))
+    
+    def extract_text_batch(self, chunks: List[Path], timeout: int = 1800) -> List[Dict]:
+        """Extraction de tous les chunks en une seule opération batch Document AI (via GCS)"""
+        bucket_name = self.batch_bucket
+        bucket = storage.Client(
+            project=self.config["google_cloud"]["project_id"],
+            credentials=self.credentials
+        ).bucket(bucket_name)
+        
+        prefix = f"documentai/{uuid.uuid4().hex}"
+        input_uris = []
+        
+        try:
+            # Dépôt des chunks dans le bucket de transit
+            for chunk_path in chunks:
+                blob = bucket.blob(f"{prefix}/input/{chunk_path.name}")
+                blob.upload_from_filename(str(chunk_path), content_type="application/pdf")
+                input_uris.append(f"gs://{bucket_name}/{blob.name}")
+            
+            logger.info("📤 %d chunks déposés dans gs://%s/%s/input", len(input_uris), bucket_name, prefix)
+            
+            request = documentai.BatchProcessRequest(
+                name=self.processor_name,
+                input_documents=documentai.BatchDocumentsInputConfig(
+                    gcs_documents=documentai.GcsDocuments(documents=[
+                        documentai.GcsDocument(gcs_uri=uri, mime_type="application/pdf")
+                        for uri in input_uris
+                    ])
+                ),
+                document_output_config=documentai.DocumentOutputConfig(
+                    gcs_output_config=documentai.DocumentOutputConfig.GcsOutputConfig(
+                        gcs_uri=f"gs://{bucket_name}/{prefix}/output/"
+                    )
+                )
+            )
+            
+            logger.info("🔍 Extraction batch: %d chunks en une opération", len(chunks))
+            operation = self.doc_ai_client.batch_process_documents(request=request)
+            operation.result(timeout=timeout)
+            
+            metadata = documentai.BatchProcessMetadata(operation.metadata)
+            if metadata.state != documentai.BatchProcessMetadata.State.SUCCEEDED:
+                raise RuntimeError(f"❌ Opération batch en échec: {metadata.state_message}")
+            
+            # Relier chaque sortie à son chunk d'entrée
+            outputs = {
+                status.input_gcs_source: status.output_gcs_destination
+                for status in metadata.individual_process_statuses
+            }
+            
+            results = []
+            for chunk_path, uri in zip(chunks, input_uris):
+                destination = outputs.get(uri)
+                if not destination:
+                    raise RuntimeError(f"❌ Aucune sortie batch pour: {chunk_path.name}")
+                
+                # La sortie peut être répartie sur plusieurs fichiers JSON (shards)
+                output_prefix = destination.split(f"gs://{bucket_name}/", 1)[1]
+                shards = sorted(
+                    (blob for blob in bucket.list_blobs(prefix=output_prefix) if blob.name.endswith(".json")),
+                    key=lambda blob: blob.name
+                )
+                
+                texts = []
+                page_count = 0
+                for shard in shards:
+                    document = documentai.Document.from_json(
+                        shard.download_as_bytes(), ignore_unknown_fields=True
+                    )
+                    texts.append(document.text)
+                    page_count += len(document.pages)
+                
+                text = "".join(texts)
+                char_count = len(text)
+                
+                if char_count < 100:
+                    raise ValueError(f"❌ Texte extrait insuffisant ({chunk_path.name}): {char_count} caractères")
+                
+                logger.info("✅ Extraction réussie: %s - %d caractères, %d pages", chunk_path.name, char_count, page_count)
+                
+                results.append({
+                    "text": text,
+                    "pages": page_count,
+                    "chunk_file": str(chunk_path),
+                    "char_count": char_count
+                })
+            
+            return results
+        
+        except Exception as e:
+            error_msg = f"❌ ÉCHEC DÉFINITIF extraction batch: {e}"
+            logger.error(error_msg)
+            raise RuntimeError(error_msg)
+        
+        finally:
+            # Nettoyage du bucket de transit
+            try:
+                for blob in bucket.list_blobs(prefix=prefix):
+                    blob.delete()
+            except Exception as e:
+                logger.warning("⚠️ Nettoyage batch incomplet (%s): %s", prefix, e)
+    
+    def analyze_chunks_parallel(self, analysis_chunks: List[Dict], language: str = 'fr') -> List[Dict]:
+        """Analyse Gemini concurrente des chunks (analysis.max_parallel), sans contexte inter-chunks"""
+        max_parallel = max(1, min(self.max_parallel_analyses, len(analysis_chunks)))
+        wait_turn = make_request_spacer(self.request_delay)
+        
+        def analyze(indexed_chunk):
+            i, chunk = indexed_chunk
+            wait_turn()
+            logger.info("🧠 Analyse Gemini EXHAUSTIVE %d/%d: %s", i + 1, len(analysis_chunks), chunk['description'])
+            return self.analyze_with_gemini_advanced(chunk, "", language)
+        
+        logger.info("⚡ Analyse de %d chunks (%d en parallèle, sans contexte partagé)", len(analysis_chunks), max_parallel)
+        
+        with ThreadPoolExecutor(max_workers=max_parallel) as executor:
+            # map conserve l'ordre des chunks et propage la première erreur
+            return list(executor.map(analyze, enumerate(analysis_chunks)))
+    
+    def fit_text_to_token_budget(self, model, text: str) -> str:
+        """Tronque le texte pour que le prompt complet tienne dans analysis.max_prompt_tokens"""
+        try:
+            # Tokens du préfixe fixe: comptés une fois par modèle
+            prefix_tokens = self.prefix_token_counts.get(model.model_name)
+            if prefix_tokens is None:
+                prefix_tokens = model.count_tokens(ANALYSIS_PROMPT_PREFIX).total_tokens
+                self.prefix_token_counts[model.model_name] = prefix_tokens
+            
+            budget = self.max_prompt_tokens - prefix_tokens - PROMPT_VARIABLE_RESERVE_TOKENS
+            text_tokens = model.count_tokens(text).total_tokens
+        except Exception as e:
+            logger.warning("⚠️ Comptage des tokens impossible, troncature à %d caractères: %s", FALLBACK_MAX_TEXT_CHARS, e)
+            return text[:FALLBACK_MAX_TEXT_CHARS]
+        
+        if text_tokens <= budget:
+            return text
+        
+        # Troncature au ratio caractères/tokens mesuré sur ce texte, avec 5% de marge
+        keep_chars = max(0, int(len(text) * budget / text_tokens * 0.95))
+        logger.info("✂️ Texte tronqué au budget de tokens: %d → ~%d tokens (%d caractères)", text_tokens, budget, keep_chars)
+        return text[:keep_chars]
+    
+    def analyze_with_gemini_advanced(self, chunk: Dict, context: str = "", language: str = 'fr') -> Dict:
+        """Analyse Gemini AVANCÉE avec modèle intelligent et double validation et support multilingue"""
+        
+        # Instructions de langue pour le prompt
+        language_instruction = {
+            'fr': "IMPORTANT: Réponds EXCLUSIVEMENT en français avec tous les textes, descriptions et valeurs en français.",
+            'en': "IMPORTANT: Respond EXCLUSIVELY in English with all texts, descriptions and values in English."
+        }
+        
+        lang_inst = language_instruction.get(language, language_instruction['fr'])
         
         # Utiliser Gemini 2.0 Flash si disponible
         try:
@@ -521,26 +1117,52 @@ CRITIQUE: Sois EXHAUSTIF, précis et technique. Capture TOUS les détails numér
             if hasattr(self, 'advanced_model') and self.advanced_model != self.gemini_model:
                 model_name = "Gemini 2.0 Flash"
             else:
-                model_name = self.config["gemini"]["model"]
+                model_name = self.gemini_model_name
         except:
             # Fallback vers le modèle configuré
             model_to_use = self.gemini_model
-            model_name = self.config["gemini"]["model"]
+            model_name = self.gemini_model_name
+        
+        # Même section déjà analysée par le même modèle avec les mêmes paramètres:
+        # réutiliser le résultat validé avant tout appel (comptage de tokens compris)
+        cache_key = hashlib.sha256("\0".join((
+            PROMPT_VERSION, model_to_use.model_name, language, context[-300:],
+            str(self.max_prompt_tokens), chunk['description'], chunk['text'],
+        )).encode('utf-8')).hexdigest()
+        cached = self.cache_get("gemini", cache_key)
+        if cached is not None:
+            logger.info("♻️ Analyse en cache: %s", chunk['description'])
+            return cached
+        
+        # Texte de la section ajusté au budget de tokens du prompt
+        section_text = self.fit_text_to_token_budget(model_to_use, chunk['text'])
+        
+        # Prompt détaillé: préfixe fixe puis langue, contexte et texte de la section
+        detailed_prompt = f"""{ANALYSIS_PROMPT_PREFIX}
+{lang_inst}
+
+CONTEXTE PRÉCÉDENT: {context[-300:] if context else "Début du document"}
+
+SECTION À ANALYSER: {chunk['description']} ({chunk['char_count']} caractères)
+
+TEXTE À ANALYSER:
+{section_text}
+
+Réponds UNIQUEMENT avec le JSON dans la structure décrite ci-dessus."""
         
         for attempt in range(2):  # Maximum 2 tentatives
             try:
-                logger.info(f"🧠 Analyse {model_name} DÉTAILLÉE: {chunk['description']} (tentative {attempt + 1})")
+                logger.info("🧠 Analyse %s DÉTAILLÉE: %s (tentative %d)", model_name, chunk['description'], attempt + 1)
                 
-                response = model_to_use.generate_content(detailed_prompt)
+                response = model_to_use.generate_content(detailed_prompt, generation_config=JSON_GENERATION_CONFIG)
                 
                 if not response or not response.text:
                     raise ValueError("❌ Gemini n'a fourni aucune réponse")
                 
                 response_text = response.text.strip()
                 
-                # DOUBLE VALIDATION avec second modèle
-                validated_json = self.validate_and_fix_json_with_gemini(response_text)
-                result = json.loads(validated_json)
+                # Parsing direct, DOUBLE VALIDATION seulement si la réponse est invalide
+                result = self.validate_and_fix_json_with_gemini(response_text)
                 
                 # Validation stricte de la structure détaillée
                 self.validate_detailed_analysis_result(result)
@@ -552,17 +1174,18 @@ CRITIQUE: Sois EXHAUSTIF, précis et technique. Capture TOUS les détails numér
                 sec_count = len(result.get('securite', []))
                 storage_count = len(result.get('stockage_reagents', []))
                 
-                logger.info(f"✅ Analyse DÉTAILLÉE réussie avec {model_name}: {proc_count} procédures, {maint_count} maintenances, {spec_count} spécs, {sec_count} sécurités, {storage_count} stockages")
+                logger.info("✅ Analyse DÉTAILLÉE réussie avec %s: %d procédures, %d maintenances, %d spécs, %d sécurités, %d stockages", model_name, proc_count, maint_count, spec_count, sec_count, storage_count)
                 
+                self.cache_put("gemini", cache_key, result)
                 return result
                 
             except json.JSONDecodeError as e:
-                logger.error(f"❌ JSON invalide même après double validation (tentative {attempt + 1}): {e}")
+                logger.error("❌ JSON invalide même après double validation (tentative %d): %s", attempt + 1, e)
                 if attempt < 1:
                     time.sleep(2)
                     
             except Exception as e:
-                logger.error(f"❌ Erreur analyse Gemini avancée (tentative {attempt + 1}): {e}")
+                logger.error("❌ Erreur analyse Gemini avancée (tentative %d): %s", attempt + 1, e)
                 if attempt < 1:
                     time.sleep(3)
         
@@ -571,14 +1194,24 @@ CRITIQUE: Sois EXHAUSTIF, précis et technique. Capture TOUS les détails numér
         logger.error(error_msg)
         raise RuntimeError(error_msg)
     
-    def validate_and_fix_json_with_gemini(self, response_text: str) -> str:
-        """Double validation: utilise Gemini pour corriger le JSON défaillant"""
+    def validate_and_fix_json_with_gemini(self, response_text: str) -> Dict:
+        """Double validation: utilise Gemini pour corriger le JSON défaillant (retourne l'objet parsé)"""
+        
+        # Chemin rapide: la réponse (mode JSON natif) est presque toujours déjà un objet valide;
+        # tout autre JSON (liste, chaîne...) passe par l'extraction entre accolades
+        try:
+            result = json_loads(response_text)
+            if isinstance(result, dict):
+                return result
+            logger.warning("⚠️ Réponse JSON non objet (%s), extraction de l'objet", type(result).__name__)
+        except json.JSONDecodeError as e:
+            logger.warning("⚠️ Réponse JSON invalide, extraction et correction: %s", e)
         
-        # D'abord, essayer l'extraction normale
+        # Ensuite, essayer l'extraction normale
         try:
             return self.extract_and_validate_json(response_text)
         except (ValueError, json.JSONDecodeError) as e:
-            logger.warning(f"⚠️ JSON invalide détecté, tentative de correction automatique: {e}")
+            logger.warning("⚠️ JSON invalide détecté, tentative de correction automatique: %s", e)
             
             # Utiliser Gemini pour corriger le JSON
             validation_prompt = f"""
@@ -611,24 +1244,25 @@ Réponds UNIQUEMENT avec le JSON corrigé, sans explanation, sans markdown."""
                     raise ValueError("❌ Gemini n'a pas pu corriger le JSON")
                     
             except Exception as correction_error:
-                logger.error(f"❌ Échec correction JSON avec Gemini: {correction_error}")
+                logger.error("❌ Échec correction JSON avec Gemini: %s", correction_error)
                 # Fallback vers correction automatique basique
                 return self.extract_and_validate_json(response_text)
     
-    def extract_and_validate_json(self, response_text: str) -> str:
-        """Extraction et validation JSON avec correction automatique"""
+    def extract_and_validate_json(self, response_text: str) -> Dict:
+        """Extraction et validation JSON avec correction automatique (retourne l'objet parsé)"""
         if not response_text or not response_text.strip():
             raise ValueError("❌ Réponse Gemini vide")
         
-        # Supprimer les blocs markdown
+        # Supprimer les blocs markdown (une recherche par motif, sans test "in" préalable)
         text = response_text
-        if "```json" in text:
-            start = text.find("```json") + 7
-            end = text.rfind("```")
-            if end > start:
-                text = text[start:end]
-        elif "```" in text:
-            start = text.find("```") + 3
+        fence = text.find("```json")
+        if fence >= 0:
+            start = fence + 7
+        else:
+            fence = text.find("```")
+            start = fence + 3 if fence >= 0 else -1
+        
+        if start >= 0:
             end = text.rfind("```")
             if end > start:
                 text = text[start:end]
@@ -642,62 +1276,42 @@ Réponds UNIQUEMENT avec le JSON corrigé, sans explanation, sans markdown."""
         
         json_text = text[first_brace:last_brace + 1].strip()
         
+        # JSON valide une fois extrait du markdown: aucune correction nécessaire
+        try:
+            return json_loads(json_text)
+        except json.JSONDecodeError:
+            pass
+        
         # Corrections automatiques des erreurs JSON courantes
         json_text = self.fix_common_json_errors(json_text)
         
-        # Validation JSON basique
+        # Parsing unique: l'objet validé est retourné directement à l'appelant
         try:
-            json.loads(json_text)  # Test de parsing
+            return json_loads(json_text)
         except json.JSONDecodeError as e:
-            logger.error(f"❌ JSON encore invalide après corrections: {e}")
-            logger.error(f"Extrait problématique: {json_text[max(0, e.pos-50):e.pos+50]}")
+            logger.error("❌ JSON encore invalide après corrections: %s", e)
+            logger.error("Extrait problématique: %s", json_text[max(0, e.pos - 50):e.pos + 50])
             raise ValueError(f"❌ JSON invalide même après corrections: {e}")
-        
-        return json_text
     
     def fix_common_json_errors(self, json_text: str) -> str:
         """Corrige automatiquement les erreurs JSON courantes"""
         
         # 1. Supprimer les virgules en fin d'objet/array
-        json_text = re.sub(r',(\s*[}\]])', r'\1', json_text)
-        
-        # 2. Échapper les guillemets dans les valeurs
-        # Protéger d'abord les structures JSON valides
-        lines = json_text.split('\n')
-        corrected_lines = []
-        
-        for line in lines:
-            # Si la ligne contient une valeur de string
-            if '": "' in line and not line.strip().endswith(',') and not line.strip().endswith('{') and not line.strip().endswith('['):
-                # Trouver la partie valeur après ": "
-                parts = line.split('": "', 1)
-                if len(parts) == 2:
-                    key_part = parts[0]
-                    value_part = parts[1]
-                    
-                    # Trouver la fin de la valeur
-                    end_quote = value_part.rfind('"')
-                    if end_quote > 0:
-                        value_content = value_part[:end_quote]
-                        rest = value_part[end_quote:]
-                        
-                        # Échapper les guillemets dans la valeur seulement
-                        value_content = value_content.replace('"', '\\"')
-                        
-                        line = key_part + '": "' + value_content + rest
-            
-            corrected_lines.append(line)
+        json_text = _TRAILING_COMMA_RE.sub(r'\1', json_text)
         
-        json_text = '\n'.join(corrected_lines)
+        # 2. Échapper les guillemets dans les valeurs (lignes "clé": "valeur" en une passe),
+        #    uniquement si une valeur peut contenir un guillemet interne
+        if _INNER_QUOTE_RE.search(json_text):
+            json_text = _STRING_VALUE_LINE_RE.sub(_escape_value_quotes, json_text)
         
         # 3. Supprimer les caractères de contrôle problématiques
-        json_text = re.sub(r'[\x00-\x1f\x7f-\x9f]', ' ', json_text)
+        json_text = json_text.translate(_CONTROL_CHARS_TABLE)
         
         # 4. Réparer les arrays mal fermés
-        json_text = re.sub(r',(\s*\])', r'\1', json_text)
+        json_text = _TRAILING_COMMA_ARRAY_RE.sub(r'\1', json_text)
         
         # 5. Supprimer les doubles virgules
-        json_text = re.sub(r',,+', ',', json_text)
+        json_text = _REPEATED_COMMAS_RE.sub(',', json_text)
         
         return json_text
     
@@ -706,19 +1320,11 @@ Réponds UNIQUEMENT avec le JSON corrigé, sans explanation, sans markdown."""
         if not isinstance(result, dict):
             raise ValueError("❌ Résultat d'analyse n'est pas un dictionnaire")
         
-        # Structure simplifiée requise
-        required_sections = [
-            'instrument', 'procedures', 'maintenance', 'specifications_techniques', 
-            'securite', 'stockage_reagents', 'validation_clinique', 'calibration', 
-            'troubleshooting', 'resume_section'
-        ]
-        
-        for section in required_sections:
-            if section not in result:
-                if section in ['instrument', 'validation_clinique', 'resume_section']:
-                    result[section] = {} if section != 'resume_section' else ""
-                else:
-                    result[section] = []
+        # Structure simplifiée requise: sections manquantes créées vides
+        for section in ANALYSIS_LIST_SECTIONS:
+            result.setdefault(section, [])
+        for section, default_factory in ANALYSIS_SCALAR_SECTIONS.items():
+            result.setdefault(section, default_factory())
         
         # Validation des procédures (critique pour sécurité)
         procedures = result.get('procedures', [])
@@ -742,7 +1348,7 @@ Réponds UNIQUEMENT avec le JSON corrigé, sans explanation, sans markdown."""
         # Log de debug pour voir ce qui a été extrait
         proc_count = len(result.get('procedures', []))
         maint_count = len(result.get('maintenance', []))
-        logger.info(f"✅ Validation OK: {proc_count} procédures, {maint_count} maintenances")
+        logger.info("✅ Validation OK: %d procédures, %d maintenances", proc_count, maint_count)
         
         return result
     
@@ -753,205 +1359,97 @@ Réponds UNIQUEMENT avec le JSON corrigé, sans explanation, sans markdown."""
         
         logger.info("🔬 Création de la synthèse médicale DÉTAILLÉE...")
         
-        # Compilation EXHAUSTIVE des données
-        all_procedures = []
-        all_maintenance = []
-        all_specs = []
-        all_security = []
-        all_calibration = []
-        all_storage = []
-        all_validation = []
-        all_troubleshooting = []
-        instrument_info = {}
-        
+        # Analyses exploitables (les entrées invalides sont signalées et ignorées)
+        valid_analyses = []
         for i, analysis in enumerate(analyses):
             if not isinstance(analysis, dict):
-                logger.warning(f"⚠️ Analyse {i+1} invalide - ignorée")
+                logger.warning("⚠️ Analyse %d invalide - ignorée", i + 1)
                 continue
-            
-            # Consolidation détaillée
-            all_procedures.extend(analysis.get("procedures", []))
-            all_maintenance.extend(analysis.get("maintenance", []))
-            all_specs.extend(analysis.get("specifications_techniques", []))
-            all_security.extend(analysis.get("securite", []))
-            all_calibration.extend(analysis.get("calibration", []))
-            all_storage.extend(analysis.get("stockage_reagents", []))
-            all_troubleshooting.extend(analysis.get("troubleshooting", []))
-            
-            # Validation clinique (important)
-            validation = analysis.get("validation_clinique", {})
-            if validation and isinstance(validation, dict):
-                all_validation.append(validation)
-            
-            # Consolidation info instrument
+            valid_analyses.append(analysis)
+        
+        # Compilation EXHAUSTIVE des données: seuls les premiers éléments de chaque catégorie
+        # entrent dans le prompt (et la synthèse de secours), les totaux sont simplement comptés
+        previews = {
+            key: list(islice(chain.from_iterable(a.get(key, ()) for a in valid_analyses), size))
+            for key, size in SYNTHESIS_PREVIEW_SIZES.items()
+        }
+        counts = {key: sum(len(a.get(key, ())) for a in valid_analyses) for key in SYNTHESIS_PREVIEW_SIZES}
+        
+        all_procedures, procedures_count = previews["procedures"], counts["procedures"]
+        all_maintenance, maintenance_count = previews["maintenance"], counts["maintenance"]
+        all_specs, specs_count = previews["specifications_techniques"], counts["specifications_techniques"]
+        all_security, security_count = previews["securite"], counts["securite"]
+        all_storage, storage_count = previews["stockage_reagents"], counts["stockage_reagents"]
+        all_troubleshooting, troubleshooting_count = previews["troubleshooting"], counts["troubleshooting"]
+        
+        # Validation clinique (important)
+        validations = [
+            validation for validation in (a.get("validation_clinique", {}) for a in valid_analyses)
+            if validation and isinstance(validation, dict)
+        ]
+        all_validation = validations[:2]
+        validation_count = len(validations)
+        
+        # Consolidation info instrument: valeurs candidates par champ, puis la plus détaillée
+        # (la première des plus longues, comme lors du remplacement au fil de l'eau)
+        instrument_candidates = defaultdict(list)
+        for analysis in valid_analyses:
             inst = analysis.get("instrument", {})
             if isinstance(inst, dict):
                 for key, value in inst.items():
-                    if value and str(value).strip() and not str(value).startswith("Non"):
-                        if key not in instrument_info or len(str(value)) > len(str(instrument_info.get(key, ""))):
-                            instrument_info[key] = value
-        
-        logger.info(f"📊 Données DÉTAILLÉES compilées:")
-        logger.info(f"   - Procédures: {len(all_procedures)}")
-        logger.info(f"   - Maintenances: {len(all_maintenance)}")
-        logger.info(f"   - Spécifications: {len(all_specs)}")
-        logger.info(f"   - Sécurité: {len(all_security)}")
-        logger.info(f"   - Stockage: {len(all_storage)}")
-        logger.info(f"   - Validation: {len(all_validation)}")
-        logger.info(f"   - Troubleshooting: {len(all_troubleshooting)}")
+                    if value:
+                        text = str(value)
+                        if text.strip() and not text.startswith("Non"):
+                            instrument_candidates[key].append((len(text), value))
+        
+        instrument_info = {
+            key: max(candidates, key=itemgetter(0))[1]
+            for key, candidates in instrument_candidates.items()
+        }
+        
+        logger.info("📊 Données DÉTAILLÉES compilées:")
+        logger.info("   - Procédures: %d", procedures_count)
+        logger.info("   - Maintenances: %d", maintenance_count)
+        logger.info("   - Spécifications: %d", specs_count)
+        logger.info("   - Sécurité: %d", security_count)
+        logger.info("   - Stockage: %d", storage_count)
+        logger.info("   - Validation: %d", validation_count)
+        logger.info("   - Troubleshooting: %d", troubleshooting_count)
         
         # Synthèse finale EXHAUSTIVE avec Gemini + double validation
         # Instructions de langue pour le prompt
-        logger.info(f"DEBUG: About to use language variable: {language}")
+        logger.debug("Langue de synthèse: %s", language)
         language_instruction = {
             'fr': "IMPORTANT: Réponds EXCLUSIVEMENT en français avec tous les textes, descriptions et valeurs en français.",
             'en': "IMPORTANT: Respond EXCLUSIVELY in English with all texts, descriptions and values in English."
         }
         lang_inst = language_instruction.get(language, language_instruction['fr'])
-        logger.info(f"DEBUG: Language instruction set to: {lang_inst[:50]}...")
-        synthesis_prompt = f"""
-Tu es un expert médical diagnostique. Créer une synthèse TECHNIQUE COMPLÈTE de cet instrument médical.
-
-{lang_inst}
-
-INFORMATIONS INSTRUMENT CONSOLIDÉES:
-{json.dumps(instrument_info, ensure_ascii=False, indent=2)}
-
-DONNÉES EXHAUSTIVES ANALYSÉES:
-
-PROCÉDURES DÉTAILLÉES ({len(all_procedures)} extraites):
-{json.dumps(all_procedures[:3], ensure_ascii=False, indent=2) if all_procedures else "Aucune procédure extraite"}
-
-MAINTENANCE PRÉVENTIVE ({len(all_maintenance)} extraites):
-{json.dumps(all_maintenance[:3], ensure_ascii=False, indent=2) if all_maintenance else "Aucune maintenance extraite"}
-
-SPÉCIFICATIONS TECHNIQUES ({len(all_specs)} extraites):
-{json.dumps(all_specs[:2], ensure_ascii=False, indent=2) if all_specs else "Aucune spécification extraite"}
-
-SÉCURITÉ ET PRÉCAUTIONS ({len(all_security)} extraites):
-{json.dumps(all_security[:2], ensure_ascii=False, indent=2) if all_security else "Aucune précaution extraite"}
-
-STOCKAGE RÉACTIFS ({len(all_storage)} extraits):
-{json.dumps(all_storage[:2], ensure_ascii=False, indent=2) if all_storage else "Aucun stockage extrait"}
-
-VALIDATION CLINIQUE:
-{json.dumps(all_validation[:2], ensure_ascii=False, indent=2) if all_validation else "Aucune validation extraite"}
-
-DÉPANNAGE ({len(all_troubleshooting)} extraits):
-{json.dumps(all_troubleshooting[:2], ensure_ascii=False, indent=2) if all_troubleshooting else "Aucun dépannage extrait"}
-
-MISSION CRITIQUE: Consolider TOUTES ces données en une synthèse technique COMPLÈTE pour usage médical professionnel. Préserver tous les détails techniques critiques (volumes, concentrations, références, limites, performances).
-
-JSON SYNTHÈSE MÉDICALE EXHAUSTIVE PARFAITEMENT FORMATÉ:
-
-{{
-    "informations_generales": {{
-        "nom_instrument": "nom complet consolidé avec toutes références",
-        "fabricant": "fabricant exact",
-        "modele": "modèle complet avec références produit",
-        "type_instrument": "type d'instrument et technologie précise",
-        "applications_principales": [
-            "application clinique détaillée 1 avec contexte",
-            "application clinique détaillée 2 avec contexte"
-        ],
-        "principe_fonctionnement": "principe technique détaillé de fonctionnement",
-        "approche_diagnostique": "méthodologie diagnostique et workflow"
-    }},
-    "procedures_analyses": [
-        {{
-            "nom_analyse": "nom complet de l'analyse avec code produit",
-            "indication_clinique": "indication médicale précise et population cible",
-            "echantillon": {{
-                "type": "type d'échantillon exact avec spécifications",
-                "volume_minimum": "volume minimum avec justification",
-                "volume_traitement": "volume de traitement avec options",
-                "anticoagulant": "anticoagulant spécifique avec alternatives"
-            }},
-            "preparation_detaillee": {{
-                "etapes": [
-                    "étape préparation 1 avec volumes/temps précis",
-                    "étape préparation 2 avec conditions/températures"
-                ],
-                "stabilite": "conditions de stabilité complètes avec durées",
-                "stockage": "conditions de stockage détaillées par phase"
-            }},
-            "procedure_analytique": {{
-                "workflow": [
-                    "étape analytique 1 avec paramètres techniques",
-                    "étape analytique 2 avec conditions de traitement"
-                ],
-                "duree_totale": "temps total avec décomposition par phase",
-                "conditions_techniques": "températures, pressions, vitesses détaillées"
-            }},
-            "performance_analytique": {{
-                "gamme_mesure": "gamme linéaire complète avec unités",
-                "limite_detection": "LoD précise avec conditions de validation",
-                "precision": "données de précision intra et inter-série (CV%)"
-            }},
-            "controles_qualite": {{
-                "types_controles": [
-                    "contrôle positif haut avec concentration cible",
-                    "contrôle négatif avec critères acceptation"
-                ],
-                "frequence": "fréquence des contrôles avec justification"
-            }},
-            "precautions_critiques": [
-                "SÉCURITÉ BIOLOGIQUE: manipulation échantillons infectieux avec EPI",
-                "QUALITÉ ANALYTIQUE: prévention contamination croisée"
-            ]
-        }}
-    ],
-    "maintenance_preventive": [
-        {{
-            "type_maintenance": "maintenance détaillée avec niveau d'intervention",
-            "frequence_precise": "fréquence exacte avec conditions déclenchantes",
-            "duree_estimee": "temps nécessaire avec marge",
-            "procedure_step_by_step": {{
-                "preparation": [
-                    "préparation 1: matériels avec références"
-                ],
-                "execution": [
-                    "étape 1: procédure avec paramètres techniques"
-                ],
-                "verification": [
-                    "contrôle 1: paramètre avec limite acceptable"
-                ]
-            }},
-            "materiels_specifiques": [
-                "matériel 1 avec référence et spécifications"
-            ]
-        }}
-    ],
-    "guide_utilisation_quotidienne": {{
-        "demarrage_systeme": [
-            "startup 1: vérifications préalables avec check-list",
-            "startup 2: initialisation avec paramètres de contrôle"
-        ],
-        "arret_systeme": [
-            "shutdown 1: finalisation analyses en cours avec sauvegarde",
-            "shutdown 2: mise en sécurité avec vérifications"
-        ],
-        "maintenance_quotidienne": [
-            "tâche quotidienne 1: contrôles de routine avec documentation"
-        ]
-    }},
-    "resume_executif": "Résumé technique et clinique EXHAUSTIF de l'instrument couvrant: technologie utilisée, applications cliniques principales, performances analytiques clés, exigences d'utilisation, considérations de maintenance et points critiques de sécurité pour usage médical professionnel"
-}}
-
-EXIGENCE ABSOLUE: JSON PARFAITEMENT VALIDE. Consolide EXHAUSTIVEMENT toutes les données en préservant les détails techniques critiques."""
+        logger.debug("Instruction de langue: %.50s...", lang_inst)
+        parts = [SYNTHESIS_PROMPT_HEADER, lang_inst, SYNTHESIS_PROMPT_INSTRUMENT, json_dumps_indent(instrument_info), SYNTHESIS_PROMPT_DATA]
+        for title, preview, empty in (
+            (f"PROCÉDURES DÉTAILLÉES ({procedures_count} extraites):\n", all_procedures[:3], "Aucune procédure extraite"),
+            (f"MAINTENANCE PRÉVENTIVE ({maintenance_count} extraites):\n", all_maintenance[:3], "Aucune maintenance extraite"),
+            (f"SPÉCIFICATIONS TECHNIQUES ({specs_count} extraites):\n", all_specs[:2], "Aucune spécification extraite"),
+            (f"SÉCURITÉ ET PRÉCAUTIONS ({security_count} extraites):\n", all_security[:2], "Aucune précaution extraite"),
+            (f"STOCKAGE RÉACTIFS ({storage_count} extraits):\n", all_storage[:2], "Aucun stockage extrait"),
+            ("VALIDATION CLINIQUE:\n", all_validation[:2], "Aucune validation extraite"),
+            (f"DÉPANNAGE ({troubleshooting_count} extraits):\n", all_troubleshooting[:2], "Aucun dépannage extrait"),
+        ):
+            parts += (title, json_dumps_indent(preview) if preview else empty, "\n\n")
+        parts.append(SYNTHESIS_PROMPT_SCHEMA)
+        synthesis_prompt = "".join(parts)
         
         try:
             # Utiliser le modèle avancé si disponible
             model_to_use = getattr(self, 'advanced_model', self.gemini_model)
             
-            response = model_to_use.generate_content(synthesis_prompt)
+            response = model_to_use.generate_content(synthesis_prompt, generation_config=JSON_GENERATION_CONFIG)
             
             if not response or not response.text:
                 raise ValueError("❌ Gemini n'a pas généré de synthèse")
             
-            # Double validation avec correction automatique
-            cleaned_json = self.validate_and_fix_json_with_gemini(response.text.strip())
-            result = json.loads(cleaned_json)
+            # Parsing direct, double validation avec correction automatique si invalide
+            result = self.validate_and_fix_json_with_gemini(response.text.strip())
             
             # Validation de la synthèse finale détaillée
             self.validate_comprehensive_synthesis(result)
@@ -960,10 +1458,13 @@ EXIGENCE ABSOLUE: JSON PARFAITEMENT VALIDE. Consolide EXHAUSTIVEMENT toutes les
             return result
             
         except Exception as e:
-            logger.error(f"❌ ÉCHEC SYNTHÈSE DÉTAILLÉE: {e}")
+            logger.error("❌ ÉCHEC SYNTHÈSE DÉTAILLÉE: %s", e)
             # Fallback: créer une synthèse de secours
             logger.warning("🚨 Création synthèse de secours détaillée...")
-            return self.create_comprehensive_fallback_synthesis(instrument_info, all_procedures, all_maintenance, all_specs, all_security)
+            return self.create_comprehensive_fallback_synthesis(
+                instrument_info, all_procedures, all_maintenance, all_specs, all_security,
+                procedures_count=procedures_count, maintenance_count=maintenance_count
+            )
     
     def validate_comprehensive_synthesis(self, synthesis: Dict):
         """Validation stricte de la synthèse exhaustive"""
@@ -977,7 +1478,7 @@ EXIGENCE ABSOLUE: JSON PARFAITEMENT VALIDE. Consolide EXHAUSTIVEMENT toutes les
         missing_critical = [sec for sec in critical_sections if not synthesis.get(sec)]
         
         if missing_critical:
-            logger.warning(f"⚠️ ATTENTION: Sections critiques manquantes: {missing_critical}")
+            logger.warning("⚠️ ATTENTION: Sections critiques manquantes: %s", missing_critical)
         
         # Vérifier résumé exécutif
         resume = synthesis.get('resume_executif', '')
@@ -996,8 +1497,14 @@ EXIGENCE ABSOLUE: JSON PARFAITEMENT VALIDE. Consolide EXHAUSTIVEMENT toutes les
         
         logger.info("✅ Synthèse exhaustive médicale validée")
     
-    def create_comprehensive_fallback_synthesis(self, instrument_info: Dict, procedures: List, maintenance: List, specs: List, security: List) -> Dict:
-        """Crée une synthèse de secours exhaustive en cas d'échec Gemini"""
+    def create_comprehensive_fallback_synthesis(self, instrument_info: Dict, procedures: List, maintenance: List, specs: List, security: List,
+                                                procedures_count: Optional[int] = None, maintenance_count: Optional[int] = None) -> Dict:
+        """Crée une synthèse de secours exhaustive en cas d'échec Gemini (totaux fournis si les listes sont des aperçus)"""
+        if procedures_count is None:
+            procedures_count = len(procedures)
+        if maintenance_count is None:
+            maintenance_count = len(maintenance)
+        
         logger.warning("🚨 Création synthèse de secours EXHAUSTIVE")
         
         return {
@@ -1015,29 +1522,29 @@ EXIGENCE ABSOLUE: JSON PARFAITEMENT VALIDE. Consolide EXHAUSTIVEMENT toutes les
                     "nom_analyse": proc.get('nom', 'Analyse non spécifiée'),
                     "indication_clinique": "Indication selon manuel complet",
                     "echantillon": {
-                        "type": proc.get('echantillon', {}).get('type', 'Non spécifié'),
-                        "volume_minimum": proc.get('echantillon', {}).get('volume_minimum', 'Voir manuel'),
-                        "volume_traitement": proc.get('echantillon', {}).get('volume_traitement', 'Voir manuel'),
-                        "anticoagulant": proc.get('echantillon', {}).get('anticoagulant', 'Selon procédure')
+                        "type": nested_get(proc, 'echantillon', 'type', default='Non spécifié'),
+                        "volume_minimum": nested_get(proc, 'echantillon', 'volume_minimum', default='Voir manuel'),
+                        "volume_traitement": nested_get(proc, 'echantillon', 'volume_traitement', default='Voir manuel'),
+                        "anticoagulant": nested_get(proc, 'echantillon', 'anticoagulant', default='Selon procédure')
                     },
                     "preparation_detaillee": {
-                        "etapes": proc.get('preparation_echantillon', {}).get('etapes', [])[:5],
-                        "stabilite": proc.get('preparation_echantillon', {}).get('stabilite', 'Voir manuel'),
-                        "stockage": proc.get('preparation_echantillon', {}).get('stockage', 'Conditions standard')
+                        "etapes": nested_get(proc, 'preparation_echantillon', 'etapes', default=[])[:5],
+                        "stabilite": nested_get(proc, 'preparation_echantillon', 'stabilite', default='Voir manuel'),
+                        "stockage": nested_get(proc, 'preparation_echantillon', 'stockage', default='Conditions standard')
                     },
                     "procedure_analytique": {
-                        "workflow": proc.get('procedure_analytique', {}).get('etapes_detaillees', [])[:6],
-                        "duree_totale": proc.get('procedure_analytique', {}).get('duree_totale', 'Voir manuel'),
-                        "conditions_techniques": proc.get('procedure_analytique', {}).get('temperature_incubation', 'Conditions contrôlées')
+                        "workflow": nested_get(proc, 'procedure_analytique', 'etapes_detaillees', default=[])[:6],
+                        "duree_totale": nested_get(proc, 'procedure_analytique', 'duree_totale', default='Voir manuel'),
+                        "conditions_techniques": nested_get(proc, 'procedure_analytique', 'temperature_incubation', default='Conditions contrôlées')
                     },
                     "performance_analytique": {
-                        "gamme_mesure": proc.get('performance', {}).get('gamme_lineaire', 'Voir spécifications'),
-                        "limite_detection": proc.get('performance', {}).get('limite_detection', 'Selon validation'),
-                        "precision": proc.get('performance', {}).get('precision', 'Données de validation')
+                        "gamme_mesure": nested_get(proc, 'performance', 'gamme_lineaire', default='Voir spécifications'),
+                        "limite_detection": nested_get(proc, 'performance', 'limite_detection', default='Selon validation'),
+                        "precision": nested_get(proc, 'performance', 'precision', default='Données de validation')
                     },
                     "controles_qualite": {
-                        "types_controles": proc.get('controles_qualite', {}).get('controles_requis', [])[:3],
-                        "frequence": proc.get('controles_qualite', {}).get('frequence', 'Selon procédure')
+                        "types_controles": nested_get(proc, 'controles_qualite', 'controles_requis', default=[])[:3],
+                        "frequence": nested_get(proc, 'controles_qualite', 'frequence', default='Selon procédure')
                     },
                     "precautions_critiques": proc.get('precautions_critiques', [])[:4]
                 }
@@ -1049,9 +1556,9 @@ EXIGENCE ABSOLUE: JSON PARFAITEMENT VALIDE. Consolide EXHAUSTIVEMENT toutes les
                     "frequence_precise": maint.get('frequence', 'Non spécifiée'),
                     "duree_estimee": maint.get('duree', 'Selon complexité'),
                     "procedure_step_by_step": {
-                        "preparation": maint.get('procedure_complete', {}).get('preparation', [])[:3],
-                        "execution": maint.get('procedure_complete', {}).get('execution', [])[:4],
-                        "verification": maint.get('procedure_complete', {}).get('verification', [])[:3]
+                        "preparation": nested_get(maint, 'procedure_complete', 'preparation', default=[])[:3],
+                        "execution": nested_get(maint, 'procedure_complete', 'execution', default=[])[:4],
+                        "verification": nested_get(maint, 'procedure_complete', 'verification', default=[])[:3]
                     },
                     "materiels_specifiques": maint.get('materiels_requis', [])[:3]
                 }
@@ -1077,12 +1584,12 @@ EXIGENCE ABSOLUE: JSON PARFAITEMENT VALIDE. Consolide EXHAUSTIVEMENT toutes les
                     "Documentation des observations"
                 ]
             },
-            "resume_executif": f"Synthèse technique exhaustive de l'instrument {instrument_info.get('nom', 'non identifié')} générée automatiquement. {len(procedures)} procédures d'analyse, {len(maintenance)} opérations de maintenance identifiées. Cette synthèse consolidée couvre les aspects critiques d'utilisation, de maintenance et de sécurité pour usage médical professionnel. Vérification obligatoire avec le manuel complet avant mise en service clinique."
+            "resume_executif": f"Synthèse technique exhaustive de l'instrument {instrument_info.get('nom', 'non identifié')} générée automatiquement. {procedures_count} procédures d'analyse, {maintenance_count} opérations de maintenance identifiées. Cette synthèse consolidée couvre les aspects critiques d'utilisation, de maintenance et de sécurité pour usage médical professionnel. Vérification obligatoire avec le manuel complet avant mise en service clinique."
         }
     
     def merge_texts_medical(self, chunk_results: List[Dict]) -> str:
         """Fusion stricte des textes avec validation médicale"""
-        full_text = ""
+        parts = []
         successful_chunks = 0
         total_chars = 0
         
@@ -1094,20 +1601,21 @@ EXIGENCE ABSOLUE: JSON PARFAITEMENT VALIDE. Consolide EXHAUSTIVEMENT toutes les
                 # En-tête de section médicale
                 section_header = f"\n\n{'='*80}\nSECTION MÉDICALE {i+1}\nPages: {chunk_result.get('pages', '?')}\nCaractères: {char_count:,}\nSource: {Path(chunk_result.get('chunk_file', '')).name}\n{'='*80}\n\n"
                 
-                full_text += section_header + chunk_text
+                parts.extend((section_header, chunk_text))
                 successful_chunks += 1
                 total_chars += char_count
                 
-                logger.info(f"✅ Section {i+1} intégrée: {char_count:,} caractères")
+                logger.info("✅ Section %d intégrée: %d caractères", i + 1, char_count)
             else:
-                logger.error(f"❌ Section {i+1} invalide - texte insuffisant")
+                logger.error("❌ Section %d invalide - texte insuffisant", i + 1)
                 raise ValueError(f"Section {i+1} contient un texte insuffisant pour analyse médicale")
         
         if successful_chunks == 0:
             raise ValueError("❌ Aucune section valide pour analyse médicale")
         
-        logger.info(f"✅ Fusion médicale: {successful_chunks} sections, {total_chars:,} caractères")
-        return full_text
+        logger.info("✅ Fusion médicale: %d sections, %d caractères", successful_chunks, total_chars)
+        # Une seule allocation pour le texte fusionné
+        return "".join(parts)
     
     def create_analysis_chunks(self, text: str) -> List[Dict]:
         """Création de chunks d'analyse optimisés pour Gemini"""
@@ -1126,45 +1634,48 @@ EXIGENCE ABSOLUE: JSON PARFAITEMENT VALIDE. Consolide EXHAUSTIVEMENT toutes les
                 "description": "Document médical complet",
                 "char_count": len(text)
             })
-            logger.info(f"📄 Document analysable en 1 chunk: {len(text):,} caractères")
+            logger.info("📄 Document analysable en 1 chunk: %d caractères", len(text))
             return chunks
         
         # Découpage par sections marquées
-        section_markers = re.findall(r'={80}\nSECTION MÉDICALE \d+', text)
-        logger.info(f"📊 {len(section_markers)} sections médicales identifiées")
+        section_count = text.count(SECTION_MARKER)
+        logger.info("📊 %d sections médicales identifiées", section_count)
         
-        if len(section_markers) > 1:
-            # Découpage intelligent par sections
-            sections = re.split(r'={80}\nSECTION MÉDICALE \d+[^\n]*\n={80}\n\n', text)
+        if section_count > 1:
+            # Découpage intelligent par sections, découpées à la volée
             
-            current_chunk = ""
+            # Sections du chunk en cours et longueur cumulée: jointure unique à la clôture du chunk
+            current_parts = []
+            current_len = 0
             chunk_sections = []
             
-            for i, section in enumerate(sections):
+            for i, section in iter_marked_sections(text):
                 if not section.strip():
                     continue
                 
-                if len(current_chunk) + len(section) > max_chars_per_chunk and current_chunk:
+                if current_len + len(section) > max_chars_per_chunk and current_parts:
                     chunks.append({
-                        "text": current_chunk,
+                        "text": "".join(current_parts),
                         "chunk_id": len(chunks),
                         "description": f"Sections médicales {chunk_sections[0]}-{chunk_sections[-1]}" if len(chunk_sections) > 1 else f"Section médicale {chunk_sections[0]}",
-                        "char_count": len(current_chunk)
+                        "char_count": current_len
                     })
                     
-                    current_chunk = ""
+                    current_parts = []
+                    current_len = 0
                     chunk_sections = []
                 
-                current_chunk += section
-                chunk_sections.append(i+1)
+                current_parts.append(section)
+                current_len += len(section)
+                chunk_sections.append(i)
             
-            # Chunk final
-            if current_chunk.strip():
+            # Chunk final (les sections retenues ne sont jamais vides)
+            if current_parts:
                 chunks.append({
-                    "text": current_chunk,
+                    "text": "".join(current_parts),
                     "chunk_id": len(chunks),
                     "description": f"Sections finales {chunk_sections[0]}-{chunk_sections[-1]}" if len(chunk_sections) > 1 else f"Section finale {chunk_sections[0]}",
-                    "char_count": len(current_chunk)
+                    "char_count": current_len
                 })
         
         else:
@@ -1183,44 +1694,43 @@ EXIGENCE ABSOLUE: JSON PARFAITEMENT VALIDE. Consolide EXHAUSTIVEMENT toutes les
         if not chunks:
             raise ValueError("❌ Échec création des chunks d'analyse")
         
-        logger.info(f"✅ {len(chunks)} chunks d'analyse créés:")
+        logger.info("✅ %d chunks d'analyse créés:", len(chunks))
         for chunk in chunks:
-            logger.info(f"   - {chunk['description']}: {chunk['char_count']:,} caractères")
+            logger.info("   - %s: %d caractères", chunk['description'], chunk['char_count'])
         
         return chunks
     
     def analyze_manual_organized(self, pdf_path: Path, language: str = 'fr') -> Dict:
         """Analyse complète stricte d'un manuel médical avec extraction exhaustive et support multilingue"""
-        logger.info(f"🏥 DÉBUT ANALYSE MÉDICALE EXHAUSTIVE: {pdf_path.name} (Language: {language})")
+        logger.info("🏥 DÉBUT ANALYSE MÉDICALE EXHAUSTIVE: %s (Language: %s)", pdf_path.name, language)
         
         pdf_chunks = []
         prepared_pdf = None
         
         try:
             # 1. Préparation et validation PDF
-            prepared_pdf = self.prepare_pdf(pdf_path)
+            prepared_pdf, source_pdf = self.prepare_pdf(pdf_path)
             
-            # 2. Découpage strict en chunks ≤15 pages
-            pdf_chunks = self.split_pdf_15pages(prepared_pdf)
-            logger.info(f"📄 {len(pdf_chunks)} chunks PDF créés")
+            # 2. Découpage strict en chunks ≤15 pages (sauf mode batch)
+            with source_pdf:
+                pdf_chunks = self.split_pdf_15pages(prepared_pdf, source_pdf)
+            logger.info("📄 %d chunks PDF créés", len(pdf_chunks))
             
             # 3. Extraction de texte stricte
-            chunk_texts = []
-            
-            for i, chunk_pdf in enumerate(pdf_chunks):
-                logger.info(f"🔍 Extraction chunk {i+1}/{len(pdf_chunks)}")
-                
-                result = self.extract_text_safe(chunk_pdf)  # Lève exception si échec
-                chunk_texts.append(result)
-                
-                # Délai entre extractions (respect des quotas)
-                if i < len(pdf_chunks) - 1:
-                    delay = self.config["analysis"]["delay_between_requests"]
-                    time.sleep(delay)
+            if self.batch_bucket:
+                # Mode batch: une seule opération Document AI pour tous les chunks
+                chunk_texts = self.extract_text_batch(pdf_chunks)
+            else:
+                chunk_texts = self.extract_texts_concurrent(pdf_chunks)  # Lève exception si échec
             
             # 4. Fusion et structuration du texte
             full_text = self.merge_texts_medical(chunk_texts)
             
+            # Les textes sont désormais dans full_text: seules les métadonnées des chunks
+            # (pages, char_count, fichier) restent en mémoire pour les statistiques
+            for chunk_result in chunk_texts:
+                chunk_result.pop("text", None)
+            
             if not full_text or len(full_text.strip()) < 500:
                 raise ValueError("❌ Texte extrait insuffisant pour analyse médicale")
             
@@ -1230,25 +1740,31 @@ EXIGENCE ABSOLUE: JSON PARFAITEMENT VALIDE. Consolide EXHAUSTIVEMENT toutes les
             if not analysis_chunks:
                 raise ValueError("❌ Impossible de créer des chunks d'analyse")
             
-            # 6. Analyse Gemini EXHAUSTIVE de chaque chunk
-            chunk_analyses = []
-            context = ""
+            # Les chunks d'analyse portent leur propre texte: le document fusionné n'est plus nécessaire
+            del full_text
             
-            for i, chunk in enumerate(analysis_chunks):
-                logger.info(f"🧠 Analyse Gemini EXHAUSTIVE {i+1}/{len(analysis_chunks)}: {chunk['description']}")
-                
-                analysis = self.analyze_with_gemini_advanced(chunk, context, language)  # Version avancée avec double validation
-                chunk_analyses.append(analysis)
-                
-                # Contexte enrichi pour chunk suivant
-                context += f"{chunk['description']}: {analysis.get('resume_section', '')}\n"
-                if analysis.get('instrument', {}).get('nom'):
-                    context += f"Instrument: {analysis['instrument']['nom']}\n"
+            # 6. Analyse Gemini EXHAUSTIVE de chaque chunk
+            if self.max_parallel_analyses > 1 and len(analysis_chunks) > 1:
+                # Chunks indépendants: appels simultanés, au prix du contexte inter-chunks
+                chunk_analyses = self.analyze_chunks_parallel(analysis_chunks, language)
+            else:
+                chunk_analyses = []
+                context = ""
                 
-                # Délai entre analyses Gemini
-                if i < len(analysis_chunks) - 1:
-                    delay = self.config["analysis"]["delay_between_requests"]
-                    time.sleep(delay)
+                for i, chunk in enumerate(analysis_chunks):
+                    logger.info("🧠 Analyse Gemini EXHAUSTIVE %d/%d: %s", i + 1, len(analysis_chunks), chunk['description'])
+                    
+                    analysis = self.analyze_with_gemini_advanced(chunk, context, language)  # Version avancée avec double validation
+                    chunk_analyses.append(analysis)
+                    
+                    # Contexte enrichi pour chunk suivant
+                    context += f"{chunk['description']}: {analysis.get('resume_section', '')}\n"
+                    if analysis.get('instrument', {}).get('nom'):
+                        context += f"Instrument: {analysis['instrument']['nom']}\n"
+                    
+                    # Délai entre analyses Gemini
+                    if i < len(analysis_chunks) - 1:
+                        time.sleep(self.request_delay)
             
             # 7. Synthèse finale médicale EXHAUSTIVE
             logger.info("🔬 Création de la synthèse médicale EXHAUSTIVE...")
@@ -1271,8 +1787,8 @@ EXIGENCE ABSOLUE: JSON PARFAITEMENT VALIDE. Consolide EXHAUSTIVEMENT toutes les
             # 10. Statistiques exhaustives
             stats = self.calculate_comprehensive_stats(pdf_chunks, analysis_chunks, chunk_texts, chunk_analyses, synthesis)
             
-            logger.info(f"✅ ANALYSE MÉDICALE EXHAUSTIVE TERMINÉE: {pdf_path.name}")
-            logger.info(f"📄 PDF médical complet créé: {output_pdf}")
+            logger.info("✅ ANALYSE MÉDICALE EXHAUSTIVE TERMINÉE: %s", pdf_path.name)
+            logger.info("📄 PDF médical complet créé: %s", output_pdf)
             
             return {
                 "success": True,
@@ -1303,29 +1819,55 @@ EXIGENCE ABSOLUE: JSON PARFAITEMENT VALIDE. Consolide EXHAUSTIVEMENT toutes les
         # Compter les éléments dans la synthèse finale
         procedures = synthesis.get("procedures_analyses", [])
         maintenance = synthesis.get("maintenance_preventive", [])
+        info = synthesis.get("informations_generales") or {}
+        guide = bool(synthesis.get("guide_utilisation_quotidienne"))
         
-        # Statistiques détaillées par procédure
-        procedures_with_performance = sum(1 for p in procedures if p.get("performance_analytique"))
-        procedures_with_controls = sum(1 for p in procedures if p.get("controles_qualite"))
-        procedures_with_precautions = sum(1 for p in procedures if p.get("precautions_critiques"))
+        # Statistiques détaillées par procédure (un seul parcours)
+        procedures_with_performance = procedures_with_controls = procedures_with_precautions = 0
+        for p in procedures:
+            get = p.get
+            procedures_with_performance += bool(get("performance_analytique"))
+            procedures_with_controls += bool(get("controles_qualite"))
+            procedures_with_precautions += bool(get("precautions_critiques"))
         
         # Statistiques de maintenance
-        maintenance_with_timing = sum(1 for m in maintenance if m.get("duree_estimee"))
-        maintenance_with_materials = sum(1 for m in maintenance if m.get("materiels_specifiques"))
+        maintenance_with_timing = maintenance_with_materials = 0
+        for m in maintenance:
+            get = m.get
+            maintenance_with_timing += bool(get("duree_estimee"))
+            maintenance_with_materials += bool(get("materiels_specifiques"))
+        
+        # Extraction: caractères totaux et textes exploitables (char_count = longueur du texte,
+        # les textes eux-mêmes ne sont plus conservés après la fusion)
+        total_chars = successful_extractions = 0
+        for result in chunk_texts:
+            char_count = result.get("char_count", 0)
+            total_chars += char_count
+            successful_extractions += char_count > 50
+        
+        # Éléments bruts extraits par les analyses de chunks
+        raw_procedures = raw_maintenance = raw_specs = raw_security = raw_storage = 0
+        for a in chunk_analyses:
+            get = a.get
+            raw_procedures += len(get("procedures", []))
+            raw_maintenance += len(get("maintenance", []))
+            raw_specs += len(get("specifications_techniques", []))
+            raw_security += len(get("securite", []))
+            raw_storage += len(get("stockage_reagents", []))
         
         return {
             "extraction": {
                 "chunks_pdf_traités": len(pdf_chunks),
                 "chunks_analysés": len(analysis_chunks),
-                "caractères_totaux": sum(result.get("char_count", 0) for result in chunk_texts),
-                "extractions_réussies": len([r for r in chunk_texts if r.get("text") and len(r["text"]) > 50])
+                "caractères_totaux": total_chars,
+                "extractions_réussies": successful_extractions
             },
             "analyse_brute": {
-                "procédures_brutes": sum(len(a.get("procedures", [])) for a in chunk_analyses),
-                "maintenances_brutes": sum(len(a.get("maintenance", [])) for a in chunk_analyses),
-                "spécifications_brutes": sum(len(a.get("specifications_techniques", [])) for a in chunk_analyses),
-                "éléments_sécurité": sum(len(a.get("securite", [])) for a in chunk_analyses),
-                "éléments_stockage": sum(len(a.get("stockage_reagents", [])) for a in chunk_analyses)
+                "procédures_brutes": raw_procedures,
+                "maintenances_brutes": raw_maintenance,
+                "spécifications_brutes": raw_specs,
+                "éléments_sécurité": raw_security,
+                "éléments_stockage": raw_storage
             },
             "synthese_finale": {
                 "procédures_consolidées": len(procedures),
@@ -1337,17 +1879,17 @@ EXIGENCE ABSOLUE: JSON PARFAITEMENT VALIDE. Consolide EXHAUSTIVEMENT toutes les
                 "maintenances_avec_matériels": maintenance_with_materials
             },
             "qualité_extraction": {
-                "instrument_identifié": bool(synthesis.get("informations_generales", {}).get("nom_instrument")),
-                "principe_technique_documenté": bool(synthesis.get("informations_generales", {}).get("principe_fonctionnement")),
-                "guide_utilisation_complet": bool(synthesis.get("guide_utilisation_quotidienne")),
+                "instrument_identifié": bool(info.get("nom_instrument")),
+                "principe_technique_documenté": bool(info.get("principe_fonctionnement")),
+                "guide_utilisation_complet": guide,
                 "résumé_exécutif_longueur": len(synthesis.get("resume_executif", "")),
-                "niveau_détail": "EXHAUSTIF" if len(procedures) > 0 and procedures_with_performance > 0 else "BASIQUE"
+                "niveau_détail": "EXHAUSTIF" if procedures_with_performance else "BASIQUE"
             },
             "conformité_médicale": {
-                "données_performance_analytique": procedures_with_performance > 0,
-                "précautions_sécurité_documentées": procedures_with_precautions > 0,
-                "maintenance_préventive_structurée": len(maintenance) > 0,
-                "guide_utilisation_quotidienne": bool(synthesis.get("guide_utilisation_quotidienne"))
+                "données_performance_analytique": bool(procedures_with_performance),
+                "précautions_sécurité_documentées": bool(procedures_with_precautions),
+                "maintenance_préventive_structurée": bool(maintenance),
+                "guide_utilisation_quotidienne": guide
             },
             "validation": "CONFORME USAGE MÉDICAL PROFESSIONNEL"
         }
@@ -1356,60 +1898,71 @@ EXIGENCE ABSOLUE: JSON PARFAITEMENT VALIDE. Consolide EXHAUSTIVEMENT toutes les
         """Nettoyage strict des fichiers temporaires"""
         logger.info("🧹 Nettoyage des fichiers temporaires...")
         
-        # Nettoyer les chunks PDF
+        # Nettoyer les chunks PDF en arrière-plan: le résultat est rendu sans attendre les
+        # suppressions (thread non-daemon, l'interpréteur l'attend avant de quitter)
         if pdf_chunks and len(pdf_chunks) > 1:
-            for chunk_file in pdf_chunks:
-                try:
-                    if chunk_file.exists():
-                        chunk_file.unlink()
-                        logger.debug(f"✅ Chunk supprimé: {chunk_file.name}")
-                except Exception as e:
-                    logger.warning(f"⚠️ Impossible de supprimer {chunk_file.name}: {e}")
-            
-            # Supprimer le dossier de chunks
-            try:
-                chunk_dir = pdf_chunks[0].parent
-                if chunk_dir.exists() and not any(chunk_dir.iterdir()):
-                    chunk_dir.rmdir()
-                    logger.info(f"✅ Dossier chunks supprimé: {chunk_dir.name}")
-            except Exception as e:
-                logger.warning(f"⚠️ Impossible de supprimer le dossier chunks: {e}")
+            threading.Thread(target=self.remove_chunk_files, args=(list(pdf_chunks),),
+                             name="chunk-cleanup").start()
         
         # Nettoyer le PDF déchiffré temporaire
-        if prepared_pdf != original_pdf and prepared_pdf.exists():
+        if prepared_pdf != original_pdf:
             try:
-                prepared_pdf.unlink()
-                logger.info(f"✅ PDF déchiffré temporaire supprimé: {prepared_pdf.name}")
-            except Exception as e:
-                logger.warning(f"⚠️ Impossible de supprimer le PDF déchiffré: {e}")
+                prepared_pdf.unlink(missing_ok=True)
+                logger.info("✅ PDF déchiffré temporaire supprimé: %s", prepared_pdf.name)
+            except OSError as e:
+                logger.warning("⚠️ Impossible de supprimer le PDF déchiffré: %s", e)
         
         logger.info("✅ Nettoyage terminé")
     
+    def remove_chunk_files(self, pdf_chunks: List[Path]):
+        """Supprime le dossier des chunks PDF et son contenu (exécuté hors du fil principal)"""
+        chunk_dir = pdf_chunks[0].parent
+        try:
+            shutil.rmtree(chunk_dir)
+            logger.info("✅ Dossier chunks supprimé: %s", chunk_dir.name)
+        except OSError as e:
+            logger.warning("⚠️ Impossible de supprimer le dossier chunks: %s", e)
+    
     def emergency_cleanup(self, pdf_chunks: List[Path], prepared_pdf: Path, original_pdf: Path):
         """Nettoyage d'urgence en cas d'erreur"""
         logger.info("🚨 Nettoyage d'urgence en cours...")
         
         try:
             self.cleanup_temp_files(pdf_chunks, prepared_pdf, original_pdf)
-        except:
-            logger.warning("⚠️ Nettoyage d'urgence partiel seulement")
+        except Exception as e:
+            logger.warning("⚠️ Nettoyage d'urgence partiel seulement: %s", e)
+
+
+@functools.lru_cache(maxsize=256)
+def format_stat_key(key: str, title: bool = False) -> str:
+    """Libellé affichable d'une clé de statistiques (clés fixes: calculé une fois par clé)"""
+    label = key.replace('_', ' ')
+    return label.title() if title else label
 
 
 def main():
     """Fonction principale STRICTE"""
-    import argparse
-    
-    parser = argparse.ArgumentParser(description="Lab Manual Analyzer - Version Médicale Stricte avec Double Validation")
-    parser.add_argument("input_path", help="Chemin vers le fichier PDF médical")
-    parser.add_argument("--config", default="config.json", help="Fichier de configuration")
+    argv = sys.argv[1:]
     
-    args = parser.parse_args()
+    # Cas courant (un seul PDF, options par défaut): argparse n'est ni importé ni construit
+    if len(argv) == 1 and not argv[0].startswith('-'):
+        input_arg, config_path, force_probe = argv[0], "config.json", False
+    else:
+        import argparse
+        
+        parser = argparse.ArgumentParser(description="Lab Manual Analyzer - Version Médicale Stricte avec Double Validation")
+        parser.add_argument("input_path", help="Chemin vers le fichier PDF médical")
+        parser.add_argument("--config", default="config.json", help="Fichier de configuration")
+        parser.add_argument("--force-probe", action="store_true", help="Forcer le test des connexions APIs (ignore le test mémorisé)")
+        
+        args = parser.parse_args(argv)
+        input_arg, config_path, force_probe = args.input_path, args.config, args.force_probe
     
     try:
         # Initialisation STRICTE
-        analyzer = LabManualAnalyzerStrict(args.config)
+        analyzer = LabManualAnalyzerStrict(config_path, force_probe=force_probe)
         
-        input_path = Path(args.input_path)
+        input_path = Path(input_arg)
         
         if not input_path.is_file() or input_path.suffix.lower() != '.pdf':
             print(f"❌ ERREUR: {input_path} n'est pas un fichier PDF valide")
@@ -1427,15 +1980,16 @@ def main():
             print(f"\n✅ ANALYSE MÉDICALE RÉUSSIE AVEC DOUBLE VALIDATION")
             print(f"📄 PDF MÉDICAL GÉNÉRÉ: {result['pdf_medical']}")
             
-            print(f"\n📊 STATISTIQUES:")
+            # Rapport de statistiques assemblé puis écrit en une seule fois
             stats = result.get("statistiques", {})
+            lines = ["\n📊 STATISTIQUES:"]
             for key, value in stats.items():
                 if isinstance(value, dict):
-                    print(f"   {key.replace('_', ' ').title()}:")
-                    for subkey, subvalue in value.items():
-                        print(f"     - {subkey.replace('_', ' ')}: {subvalue}")
+                    lines.append(f"   {format_stat_key(key, title=True)}:")
+                    lines.extend(f"     - {format_stat_key(subkey)}: {subvalue}" for subkey, subvalue in value.items())
                 else:
-                    print(f"   {key.replace('_', ' ').title()}: {value}")
+                    lines.append(f"   {format_stat_key(key, title=True)}: {value}")
+            sys.stdout.write("\n".join(lines) + "\n")
             
             print(f"\n🔬 VALIDATION: {result.get('validation')}")
             
@@ -1466,7 +2020,7 @@ def main():
     
     except Exception as e:
         print(f"\n💥 ERREUR CRITIQUE SYSTÈME: {e}")
-        logger.error(f"Erreur critique dans main: {e}")
+        logger.error("Erreur critique dans main: %s", e)
         print(f"\n🚨 ANALYSE INTERROMPUE - Aucun fichier généré")
         print(f"   Ceci est normal en mode médical strict")
         print(f"   Consultez lab_analysis.log pour diagnostic complet")
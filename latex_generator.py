@@ -70,11 +70,11 @@ class LatexSynthesisGenerator:
                     output_path.unlink()
                 return False
             
-            logger.info(f"✅ SYNTHÈSE MÉDICALE ManualMiner PDF GÉNÉRÉE: {output_path}")
+            logger.info("✅ SYNTHÈSE MÉDICALE ManualMiner PDF GÉNÉRÉE: %s", output_path)
             return True
                 
         except Exception as e:
-            logger.error(f"❌ ERREUR GÉNÉRATION ManualMiner: {e}")
+            logger.error("❌ ERREUR GÉNÉRATION ManualMiner: %s", e)
             if output_path.exists():
                 try:
                     output_path.unlink()
@@ -341,7 +341,7 @@ Toujours vérifier les procédures critiques dans le manuel complet.}}
                 with open(tex_file, 'w', encoding='utf-8') as f:
                     f.write(latex_content)
                 
-                logger.info(f"📄 Compilation LaTeX ManualMiner: {manual_name[:50]}")
+                logger.info("📄 Compilation LaTeX ManualMiner: %s", manual_name[:50])
                 
                 # Configuration optimisée pour document médical ManualMiner
                 env = dict(os.environ)
@@ -388,18 +388,18 @@ Toujours vérifier les procédures critiques dans le manuel complet.}}
                 # Vérifier PDF généré (priorité au résultat)
                 pdf_file = temp_dir_path / "manualminer_synthesis.pdf"
                 if pdf_file.exists() and pdf_file.stat().st_size > 5000:
-                    logger.info(f"PDF ManualMiner généré: {pdf_file.stat().st_size:,} bytes")
+                    logger.info("PDF ManualMiner généré: %d bytes", pdf_file.stat().st_size)
                     
                     # Copie vers destination
                     shutil.copy2(pdf_file, output_path)
                     
                     if output_path.exists():
                         final_size = output_path.stat().st_size
-                        logger.info(f"PDF médical ManualMiner créé: {final_size:,} bytes")
+                        logger.info("PDF médical ManualMiner créé: %d bytes", final_size)
                         return True
                 
                 # Échec - diagnostics détaillés
-                logger.error(f"Compilation échouée ManualMiner (codes {result1.returncode}, {result2.returncode})")
+                logger.error("Compilation échouée ManualMiner (codes %d, %d)", result1.returncode, result2.returncode)
                 
                 # Diagnostics spécifiques pour document exhaustif
                 stderr1 = result1.stderr.lower()
@@ -414,7 +414,7 @@ Toujours vérifier les procédures critiques dans le manuel complet.}}
                     logger.error("   Document très détaillé, certains caractères spéciaux posent problème")
                 else:
                     logger.error("Diagnostic: Document LaTeX ManualMiner complexe")
-                    logger.error(f"   STDERR: {result1.stderr[:300]}")
+                    logger.error("   STDERR: %s", result1.stderr[:300])
                 
                 return False
                     
@@ -426,7 +426,7 @@ Toujours vérifier les procédures critiques dans le manuel complet.}}
             logger.error("   2. Augmenter le timeout si nécessaire")
             return False
         except Exception as e:
-            logger.error(f"ERREUR critique compilation ManualMiner: {e}")
+            logger.error("ERREUR critique compilation ManualMiner: %s", e)
             return False
 
     def generate_exhaustive_procedures_section(self, procedures: List[Dict]) -> str:
@@ -39,7 +39,7 @@ def decrypt_pdf(input_path: Path, output_path: Path, password: str = "") -> bool
                 # Tentative avec strict=False pour les PDFs mal formés
                 pdf_reader = PyPDF2.PdfReader(file, strict=False)
             except Exception as e:
-                logger.warning(f"Erreur lecture PDF avec strict=False: {e}")
+                logger.warning("Erreur lecture PDF avec strict=False: %s", e)
                 # Essayer avec strict=True
                 file.seek(0)
                 pdf_reader = PyPDF2.PdfReader(file, strict=True)
@@ -53,13 +53,13 @@ def decrypt_pdf(input_path: Path, output_path: Path, password: str = "") -> bool
                 return True
             
             # Essayer de déchiffrer
-            logger.info(f"PDF chiffré détecté...")
+            logger.info("PDF chiffré détecté...")
             
             # Essayer d'abord sans mot de passe (parfois ça marche)
             if pdf_reader.decrypt(""):
                 logger.info("Déchiffré sans mot de passe")
             elif password and pdf_reader.decrypt(password):
-                logger.info(f"Déchiffré avec le mot de passe fourni")
+                logger.info("Déchiffré avec le mot de passe fourni")
             else:
                 # Essayer des mots de passe courants
                 common_passwords = [
@@ -70,7 +70,7 @@ def decrypt_pdf(input_path: Path, output_path: Path, password: str = "") -> bool
                 decrypted = False
                 for pwd in common_passwords:
                     if pdf_reader.decrypt(pwd):
-                        logger.info(f"Déchiffré avec mot de passe: '{pwd}'")
+                        logger.info("Déchiffré avec mot de passe: '%s'", pwd)
                         decrypted = True
                         break
                 
@@ -90,7 +90,7 @@ def decrypt_pdf(input_path: Path, output_path: Path, password: str = "") -> bool
                     pdf_writer.add_page(page)
                     successful_pages += 1
                 except Exception as page_error:
-                    logger.warning(f"Erreur page {page_num + 1}: {page_error}")
+                    logger.warning("Erreur page %d: %s", page_num + 1, page_error)
                     # Continuer avec les autres pages
                     continue
             
@@ -103,15 +103,15 @@ def decrypt_pdf(input_path: Path, output_path: Path, password: str = "") -> bool
                 pdf_writer.write(output_file)
             
             if successful_pages < total_pages:
-                logger.warning(f"PDF partiellement traité: {successful_pages}/{total_pages} pages")
+                logger.warning("PDF partiellement traité: %d/%d pages", successful_pages, total_pages)
             else:
-                logger.info(f"PDF traité avec succès: {successful_pages} pages")
+                logger.info("PDF traité avec succès: %d pages", successful_pages)
             
-            logger.info(f"PDF sauvegardé: {output_path}")
+            logger.info("PDF sauvegardé: %s", output_path)
             return True
             
     except Exception as e:
-        logger.error(f"Erreur lors du traitement PDF: {e}")
+        logger.error("Erreur lors du traitement PDF: %s", e)
         # Essayer une copie directe en cas d'échec total
         try:
             logger.info("Tentative de copie directe du fichier...")
@@ -120,7 +120,7 @@ def decrypt_pdf(input_path: Path, output_path: Path, password: str = "") -> bool
             logger.info("Copie directe réussie")
             return True
         except Exception as copy_error:
-            logger.error(f"Échec copie directe: {copy_error}")
+            logger.error("Échec copie directe: %s", copy_error)
             return False
 
 def batch_decrypt_pdfs(input_dir: str, output_dir: str = None):
@@ -146,22 +146,22 @@ def batch_decrypt_pdfs(input_dir: str, output_dir: str = None):
         logger.warning("Aucun fichier PDF trouvé")
         return
     
-    logger.info(f"Trouvé {len(pdf_files)} fichiers PDF")
+    logger.info("Trouvé %d fichiers PDF", len(pdf_files))
     
     success_count = 0
     
     for pdf_file in pdf_files:
-        logger.info(f"Traitement de: {pdf_file.name}")
+        logger.info("Traitement de: %s", pdf_file.name)
         
         output_file = output_path / f"decrypted_{pdf_file.name}"
         
         if decrypt_pdf(pdf_file, output_file):
             success_count += 1
         else:
-            logger.warning(f"Échec pour: {pdf_file.name}")
+            logger.warning("Échec pour: %s", pdf_file.name)
     
-    logger.info(f"Déchiffrement terminé: {success_count}/{len(pdf_files)} réussis")
-    logger.info(f"Fichiers déchiffrés dans: {output_path}")
+    logger.info("Déchiffrement terminé: %d/%d réussis", success_count, len(pdf_files))
+    logger.info("Fichiers déchiffrés dans: %s", output_path)
 
 def main():
     """Interface en ligne de commande"""
@@ -8,31 +8,28 @@ import os
 from pathlib import Path
 import sys
 
+# Clés essentielles (section, clé) vérifiées en une seule passe
+REQUIRED_KEYS = (
+    ("google_cloud", "project_id"),
+    ("google_cloud", "processor_id"),
+    ("google_cloud", "credentials_path"),
+    ("gemini", "api_key")
+)
+
 def test_config_simple():
     """Test simplifié qui retourne 0 si OK, 1 si erreur"""
     
     try:
-        # Vérifier config.json
-        if not Path("config.json").exists():
+        # Lire config.json (présence vérifiée par l'ouverture elle-même)
+        try:
+            with open("config.json", 'r', encoding='utf-8') as f:
+                config = json.load(f)
+        except FileNotFoundError:
             return 1
         
-        with open("config.json", 'r', encoding='utf-8') as f:
-            config = json.load(f)
-        
         # Vérifier les clés essentielles
-        required_keys = [
-            ("google_cloud", "project_id"),
-            ("google_cloud", "processor_id"), 
-            ("google_cloud", "credentials_path"),
-            ("gemini", "api_key")
-        ]
-        
-        for section, key in required_keys:
-            if section not in config:
-                return 1
-            if key not in config[section]:
-                return 1
-            value = config[section][key]
+        for section, key in REQUIRED_KEYS:
+            value = config.get(section, {}).get(key)
             if not value or str(value).startswith("YOUR_"):
                 return 1
         